@@ -3,12 +3,33 @@ Implementação do algoritmo A* para busca de caminho mínimo.
 Utiliza heurística de Haversine para estimar distâncias geográficas.
 """
 
-from typing import List, Dict, Tuple, Optional, Set
+from typing import List, Dict, Tuple, Optional, Set, Union
+from weakref import WeakKeyDictionary
+from functools import lru_cache
 import networkx as nx
+import numpy as np
 from datastructures import filaPrioridade, Pilha
-import math
+from numba_compat import NUMBA_AVAILABLE, vectorize
+from math import isnan
 
 from dijkstra import find_path_dijkstra
+from geo import (_R, _haversine_kernel, _cheap_heuristic, get_node_coordinates,
+                 _precompute_coords)
+from a_star_numba import find_path_a_star_numba
+
+# Política de max_open='auto': grafos até este tamanho mantêm a busca exata;
+# acima dele a lista aberta é limitada a _AUTO_OPEN_LIMIT entradas.
+_AUTO_OPEN_EXACT_UP_TO = 10000
+_AUTO_OPEN_LIMIT = 512
+
+# Heurística memoizada por grafo, indexada pelos índices inteiros dos nós
+_heuristic_cache = WeakKeyDictionary()
+_HEURISTIC_CACHE_SIZE = 131072
+
+@vectorize(cache=True, fastmath=True)
+def _haversine_kernel_vector(lat1, lon1, lat2, lon2):
+    """Versão ufunc do kernel de Haversine para arrays."""
+    return _haversine_kernel(lat1, lon1, lat2, lon2)
 
 def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """
@@ -19,71 +40,122 @@ def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
         lat2, lon2: Coordenadas do segundo ponto (latitude, longitude)
         
     Returns:
-        Distância em quilômetros
+        Distância em metros
+    """
+    # Escalares de math (ou o kernel compilado), sem arrays 0-d do NumPy
+    return float(_haversine_kernel(lat1, lon1, lat2, lon2))
+
+def haversine_distance_vector(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """
+    Versão vetorizada de haversine_distance para arrays NumPy.
+    
+    Os quatro argumentos seguem as regras de broadcasting do NumPy, então
+    é possível calcular todos os pares de uma vez (ex.: lat1[:, None] contra
+    lat2[None, :] gera uma matriz (n, m)).
+    
+    Args:
+        lat1, lon1: Coordenadas de origem (arrays ou escalares)
+        lat2, lon2: Coordenadas de destino (arrays ou escalares)
+        
+    Returns:
+        Array de distâncias em metros
     """
-    R = 6371.0
+    if NUMBA_AVAILABLE:
+        return _haversine_kernel_vector(np.asarray(lat1, dtype=np.float64),
+                                        np.asarray(lon1, dtype=np.float64),
+                                        np.asarray(lat2, dtype=np.float64),
+                                        np.asarray(lon2, dtype=np.float64))
     
-    lat1_rad = math.radians(lat1)
-    lon1_rad = math.radians(lon1)
-    lat2_rad = math.radians(lat2)
-    lon2_rad = math.radians(lon2)
+    lat1 = np.radians(np.asarray(lat1, dtype=np.float64))
+    lon1 = np.radians(np.asarray(lon1, dtype=np.float64))
+    lat2 = np.radians(np.asarray(lat2, dtype=np.float64))
+    lon2 = np.radians(np.asarray(lon2, dtype=np.float64))
     
-    dlat = lat2_rad - lat1_rad
-    dlon = lon2_rad - lon1_rad
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
     
-    a = (math.sin(dlat / 2) ** 2 + 
-         math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon / 2) ** 2)
-    c = 2 * math.asin(math.sqrt(a))
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    c = 2 * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+    
+    return (_R * c) * 1000.0
 
-    return (R * c) * 1000.0
 
-def get_node_coordinates(graph: nx.DiGraph, node: int) -> Tuple[float, float]:
+def _heuristic_function(graph: nx.DiGraph):
     """
-    Extrai coordenadas geográficas de um nó do grafo.
+    Retorna h(i, j) memoizada com lru_cache para o grafo, onde i e j são
+    índices da tabela de _precompute_coords.
     
-    Args:
-        graph: Grafo com atributos de coordenadas
-        node: ID do nó
-        
-    Returns:
-        Tuple (latitude, longitude)
+    A cache é descartada junto com a tabela de coordenadas, de modo que um
+    grafo alterado nunca reaproveita valores antigos.
     """
-    node_data = graph.nodes[node]
-    
-    if 'y' in node_data and 'x' in node_data:
-        return node_data['y'], node_data['x'] 
-    elif 'lat' in node_data and 'lon' in node_data:
-        return node_data['lat'], node_data['lon']
-    elif 'latitude' in node_data and 'longitude' in node_data:
-        return node_data['latitude'], node_data['longitude']
-    else:
-        return (0.0, 0.0)  
+    coords = _precompute_coords(graph)
+    cached = _heuristic_cache.get(graph)
+    if cached is not None and cached[0] is coords:
+        return cached[1]
+    
+    # Floats do Python: indexar o array devolveria escalares do NumPy, mais
+    # lentos nas operações escalares do kernel
+    lats, lons = coords[0].tolist(), coords[1].tolist()
+    
+    @lru_cache(maxsize=_HEURISTIC_CACHE_SIZE)
+    def heuristic(i: int, j: int) -> float:
+        lat1, lon1, lat2, lon2 = lats[i], lons[i], lats[j], lons[j]
+        # NaN indica coordenadas não numéricas
+        if isnan(lat1 + lon1 + lat2 + lon2):
+            return 0.0
+        return _cheap_heuristic(lat1, lon1, lat2, lon2)
+    
+    _heuristic_cache[graph] = (coords, heuristic)
+    return heuristic
 
 def calculate_heuristic(graph: nx.DiGraph, current: int, goal: int) -> float:
     """
     Calcula a heurística (distância em linha reta) entre dois nós.
     
+    Para nós próximos usa a aproximação equiretangular de _cheap_heuristic,
+    que nunca excede o Haversine.
+    
     Args:
         graph: Grafo com coordenadas geográficas
         current: Nó atual
         goal: Nó objetivo
         
     Returns:
-        Distância heurística em quilômetros
+        Distância heurística em metros (0.0 se as coordenadas forem inválidas)
     """
-    try:
-        lat1, lon1 = get_node_coordinates(graph, current)
-        lat2, lon2 = get_node_coordinates(graph, goal)
-        return haversine_distance(lat1, lon1, lat2, lon2)
-    except (KeyError, TypeError):
+    heuristic = _heuristic_function(graph)
+    node_index = _precompute_coords(graph)[2]
+    i = node_index.get(current)
+    j = node_index.get(goal)
+    if i is None or j is None:
         return 0.0
+    
+    return heuristic(i, j)
 
 
 def find_path_a_star(graph: nx.DiGraph,
                      start: int,
-                     end: int) -> Tuple[List[int], float]:
+                     end: int,
+                     heuristic: Optional[Dict[int, float]] = None,
+                     max_open: Optional[Union[int, str]] = None) -> Tuple[List[int], float]:
     """
     Encontra o caminho mínimo entre dois nós usando o algoritmo A*.
+    
+    Com Numba disponível e sem heuristic/max_open, a busca é delegada a
+    a_star_numba.find_path_a_star_numba, que calcula _cheap_heuristic dentro
+    do kernel compilado; a heurística memoizada de _heuristic_function só é
+    usada no laço em Python.
+    
+    Args:
+        graph: Grafo dirigido e ponderado com coordenadas
+        start: Nó de origem
+        end: Nó de destino
+        heuristic: (opcional) Tabela {nó: h(nó, end)} pré-computada; quando
+            fornecida substitui as chamadas a calculate_heuristic
+        max_open: (opcional) Limite da lista aberta. Quando excede o dobro do
+            limite, as entradas de pior f são descartadas. Troca a garantia de
+            caminho ótimo (e até de encontrar um caminho) por menos memória e
+            tempo em grafos grandes. 'auto' escolhe o limite pelo tamanho do grafo.
     """
     if start == end:
         return [start], 0.0
@@ -91,21 +163,43 @@ def find_path_a_star(graph: nx.DiGraph,
     if not graph.has_node(start) or not graph.has_node(end):
         return [], float('inf')
 
-    g_score = {node: float('inf') for node in graph.nodes()}
-    f_score = {node: float('inf') for node in graph.nodes()}
-    predecessors = {node: None for node in graph.nodes()}
+    # Tabelas esparsas: só os nós alcançados entram em g_score/predecessors,
+    # evitando inicializar dicionários do tamanho do grafo a cada busca.
+    # 'visited' é a lista fechada (hash). Cada entrada do heap guarda o g com
+    # que foi inserida: uma entrada cujo g não é mais o melhor está obsoleta e
+    # é descartada ao ser retirada (remoção preguiçosa, sem decrease-key).
+    g_score = {}
+    predecessors = {start: None}
     visited = set()
+    inf = float('inf')
+
+    if max_open == 'auto':
+        max_open = _auto_open_limit(graph.number_of_nodes())
+    elif max_open is not None and (isinstance(max_open, bool) or not isinstance(max_open, int) or max_open <= 0):
+        raise ValueError(f"max_open inválido: {max_open!r}. Use None, 'auto' ou um inteiro positivo")
+
+    if NUMBA_AVAILABLE and heuristic is None and max_open is None:
+        # Com Numba, o laço inteiro roda compilado sobre arrays CSR
+        return find_path_a_star_numba(graph, start, end)
+
+    if heuristic is not None:
+        h = lambda node: heuristic.get(node, 0.0)
+    else:
+        # Resolve a tabela e a cache uma única vez por busca
+        cached_heuristic = _heuristic_function(graph)
+        node_index = _precompute_coords(graph)[2]
+        goal_index = node_index[end]
+        h = lambda node: cached_heuristic(node_index[node], goal_index)
 
     g_score[start] = 0.0
-    f_score[start] = calculate_heuristic(graph, start, end)
 
     priority_queue = filaPrioridade()
-    priority_queue.put(start, f_score[start])
+    priority_queue.put((start, 0.0), h(start))
 
     while not priority_queue.is_empty():
-        current = priority_queue.get()
+        current, entry_g_score = priority_queue.get()
 
-        if current in visited:
+        if entry_g_score > g_score[current] or current in visited:
             continue
 
         visited.add(current)
@@ -116,6 +210,9 @@ def find_path_a_star(graph: nx.DiGraph,
         if current not in graph.adj:
             continue
 
+        if max_open is not None and len(priority_queue) > 2 * max_open:
+            priority_queue.truncate(max_open)
+
         # --- INÍCIO DA CORREÇÃO ---
         # Verifica se o grafo é um MultiGraph (do osmnx) ou um DiGraph (dos testes)
 
@@ -138,11 +235,10 @@ def find_path_a_star(graph: nx.DiGraph,
                 edge_weight = best_weight
                 tentative_g_score = g_score[current] + edge_weight
 
-                if tentative_g_score < g_score[neighbor]:
+                if tentative_g_score < g_score.get(neighbor, inf):
                     predecessors[neighbor] = current
                     g_score[neighbor] = tentative_g_score
-                    f_score[neighbor] = g_score[neighbor] + calculate_heuristic(graph, neighbor, end)
-                    priority_queue.put(neighbor, f_score[neighbor])
+                    priority_queue.put((neighbor, tentative_g_score), tentative_g_score + h(neighbor))
         else:
             # Lógica para DiGraph simples (usado pelos testes unitários)
             for neighbor, edge_data in graph.adj[current].items():
@@ -155,19 +251,135 @@ def find_path_a_star(graph: nx.DiGraph,
 
                 tentative_g_score = g_score[current] + edge_weight
 
-                if tentative_g_score < g_score[neighbor]:
+                if tentative_g_score < g_score.get(neighbor, inf):
                     predecessors[neighbor] = current
                     g_score[neighbor] = tentative_g_score
-                    f_score[neighbor] = g_score[neighbor] + calculate_heuristic(graph, neighbor, end)
-                    priority_queue.put(neighbor, f_score[neighbor])
+                    priority_queue.put((neighbor, tentative_g_score), tentative_g_score + h(neighbor))
         # --- FIM DA CORREÇÃO ---
 
-    if g_score[end] == float('inf'):
+    if end not in g_score:
         return [], float('inf')
 
     path = reconstruct_path(predecessors, start, end)
     return path, g_score[end]
 
+def _auto_open_limit(num_nodes: int) -> Optional[int]:
+    """Limite da lista aberta usado por max_open='auto' (None = sem limite)."""
+    if num_nodes <= _AUTO_OPEN_EXACT_UP_TO:
+        return None
+    return _AUTO_OPEN_LIMIT
+
+def _edge_weight(edge_data: Dict, multigraph: bool) -> float:
+    """Peso de uma adjacência com as mesmas regras de find_path_a_star."""
+    if multigraph:
+        best_weight = float('inf')
+        for data in edge_data.values():
+            weight = data.get('length', data.get('weight', float('inf')))
+            if weight < best_weight:
+                best_weight = weight
+        return best_weight
+    return edge_data.get('length', edge_data.get('weight', 1.0))
+
+def find_path_a_star_bidirectional(graph: nx.DiGraph,
+                                   start: int,
+                                   end: int) -> Tuple[List[int], float]:
+    """
+    A* bidirecional: uma busca a partir da origem e outra a partir do destino
+    (sobre as arestas de entrada), que se encontram no meio do caminho.
+    
+    Usa potenciais médios p(v) = (h(v, end) - h(start, v)) / 2 na busca
+    direta e -p(v) na reversa, o que mantém os custos reduzidos não
+    negativos quando a heurística é consistente. A busca para quando a soma
+    dos topos das duas filas alcança o melhor caminho encontrado.
+    
+    Args:
+        graph: Grafo dirigido e ponderado com coordenadas
+        start: Nó de origem
+        end: Nó de destino
+        
+    Returns:
+        Tupla (caminho, distância) ou ([], inf) se não houver caminho
+    """
+    if start == end:
+        return [start], 0.0
+
+    if not graph.has_node(start) or not graph.has_node(end):
+        return [], float('inf')
+
+    inf = float('inf')
+    cached_heuristic = _heuristic_function(graph)
+    node_index = _precompute_coords(graph)[2]
+    start_index, end_index = node_index[start], node_index[end]
+
+    def potential(node):
+        i = node_index[node]
+        return (cached_heuristic(i, end_index) - cached_heuristic(start_index, i)) / 2.0
+
+    multigraph = graph.is_multigraph()
+    adjacency = (graph.adj, graph.pred if graph.is_directed() else graph.adj)
+    signs = (1.0, -1.0)
+    g_score = ({start: 0.0}, {end: 0.0})
+    predecessors = ({start: None}, {end: None})
+    visited = (set(), set())
+    queues = (filaPrioridade(), filaPrioridade())
+    queues[0].put((start, 0.0), potential(start))
+    queues[1].put((end, 0.0), -potential(end))
+
+    best_distance = inf
+    meeting_node = None
+
+    while not queues[0].is_empty() and not queues[1].is_empty():
+        if queues[0].peek_priority() + queues[1].peek_priority() >= best_distance:
+            break
+
+        # Expande o lado com a menor fila
+        side = 0 if len(queues[0]) <= len(queues[1]) else 1
+        other = 1 - side
+        current, entry_g_score = queues[side].get()
+
+        # Entrada obsoleta (o nó já foi reinserido com g menor) ou já fechada
+        if entry_g_score > g_score[side][current] or current in visited[side]:
+            continue
+
+        visited[side].add(current)
+
+        if current not in adjacency[side]:
+            continue
+
+        for neighbor, edge_data in adjacency[side][current].items():
+            edge_weight = _edge_weight(edge_data, multigraph)
+            if edge_weight == inf:
+                continue
+
+            tentative_g_score = g_score[side][current] + edge_weight
+
+            # Caminho completo passando pela aresta current -> neighbor
+            other_g_score = g_score[other].get(neighbor)
+            if other_g_score is not None and tentative_g_score + other_g_score < best_distance:
+                best_distance = tentative_g_score + other_g_score
+                meeting_node = neighbor
+
+            if neighbor in visited[side]:
+                continue
+
+            if tentative_g_score < g_score[side].get(neighbor, inf):
+                predecessors[side][neighbor] = current
+                g_score[side][neighbor] = tentative_g_score
+                queues[side].put((neighbor, tentative_g_score),
+                                 tentative_g_score + signs[side] * potential(neighbor))
+
+    if meeting_node is None:
+        return [], inf
+
+    # Metade da origem até o encontro + metade do encontro até o destino
+    path = reconstruct_path(predecessors[0], start, meeting_node)
+    current = predecessors[1][meeting_node]
+    while current is not None:
+        path.append(current)
+        current = predecessors[1][current]
+
+    return path, best_distance
+
 def reconstruct_path(predecessors: Dict[int, Optional[int]], 
                     start: int, 
                     end: int) -> List[int]:
@@ -183,7 +395,7 @@ def reconstruct_path(predecessors: Dict[int, Optional[int]],
     Returns:
         Lista de nós representando o caminho
     """
-    if predecessors[end] is None and start != end:
+    if predecessors.get(end) is None and start != end:
         return []
     
     path_stack = Pilha()
@@ -201,22 +413,74 @@ def reconstruct_path(predecessors: Dict[int, Optional[int]],
 
 def get_shortest_distance_a_star(graph: nx.DiGraph, 
                                 start: int, 
-                                end: int) -> float:
+                                end: int,
+                                heuristic: Optional[Dict[int, float]] = None) -> float:
     """
     Retorna apenas a distância mínima entre dois nós usando A*.
     Mais eficiente quando não se precisa do caminho completo.
     
+    Sem tabela de heurística usa o A* bidirecional; a tabela só serve para
+    um destino fixo, então nesse caso a busca é unidirecional.
+    
     Args:
         graph: Grafo dirigido e ponderado com coordenadas
         start: Nó de origem
         end: Nó de destino
+        heuristic: (opcional) Tabela {nó: h(nó, end)} pré-computada
         
     Returns:
         Distância mínima ou float('inf') se não houver caminho
     """
-    path, distance = find_path_a_star(graph, start, end)
+    if heuristic is None:
+        path, distance = find_path_a_star_bidirectional(graph, start, end)
+    else:
+        path, distance = find_path_a_star(graph, start, end, heuristic)
     return distance
 
+def find_nearest_target_a_star(graph: nx.DiGraph,
+                               start: int,
+                               targets: List[int]) -> Tuple[Optional[int], float]:
+    """
+    Encontra, entre 'targets', o nó de menor distância de caminho a partir de 'start'.
+    
+    Os candidatos são examinados em ordem crescente de distância em linha
+    reta (Haversine, a mesma cota inferior admissível usada pelo A*); a
+    varredura para assim que a cota do próximo candidato supera a melhor
+    distância real já encontrada, então em geral poucas buscas são feitas.
+    Em caso de empate vence o candidato que aparece primeiro em 'targets'.
+    
+    Args:
+        graph: Grafo dirigido e ponderado com coordenadas
+        start: Nó de origem
+        targets: Nós candidatos
+        
+    Returns:
+        Tupla (posição do mais próximo em 'targets', distância) ou
+        (None, float('inf')) se nenhum for alcançável
+    """
+    if not targets:
+        return None, float('inf')
+    
+    lats, lons, node_index = _precompute_coords(graph)
+    i = node_index.get(start)
+    columns = np.array([node_index.get(target, -1) for target in targets], dtype=np.int64)
+    if i is None:
+        bounds = np.zeros(len(targets))
+    else:
+        bounds = haversine_distance_vector(lats[i], lons[i], lats[columns], lons[columns])
+        # Coordenadas inválidas ou nó ausente: sem cota (0 nunca exclui o candidato)
+        bounds = np.where(np.isnan(bounds) | (columns < 0), 0.0, bounds)
+    
+    best, best_distance = None, float('inf')
+    for k in np.argsort(bounds, kind='stable').tolist():
+        if bounds[k] > best_distance:
+            break
+        distance = get_shortest_distance_a_star(graph, start, targets[k])
+        if distance < best_distance or (distance == best_distance and best is not None and k < best):
+            best, best_distance = k, distance
+    
+    return best, best_distance
+
 def validate_graph_for_a_star(graph: nx.DiGraph) -> bool:
     """
     Valida se o grafo é adequado para o algoritmo A*.
@@ -231,10 +495,16 @@ def validate_graph_for_a_star(graph: nx.DiGraph) -> bool:
     if not isinstance(graph, nx.DiGraph):
         return False
     
-    for u, v, data in graph.edges(data=True):
-        weight = data.get('length', data.get('weight', 1.0))
-        if weight < 0:
-            return False
+    # Um único array de pesos e min() no lugar de comparações em Python
+    try:
+        weights = np.fromiter((data.get('length', data.get('weight', 1.0))
+                               for _, _, data in graph.edges(data=True)),
+                              dtype=np.float64, count=graph.number_of_edges())
+    except (TypeError, ValueError):
+        return False
+    
+    if weights.size and weights.min() < 0:
+        return False
     
     sample_nodes = list(graph.nodes())[:5] 
     for node in sample_nodes:
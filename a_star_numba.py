@@ -0,0 +1,144 @@
+"""
+A* compilado com Numba sobre o grafo em arrays CSR.
+O laço inteiro (heap, relaxação e heurística) roda no kernel, sem acessar
+os dicionários do NetworkX durante a busca.
+"""
+
+from typing import List, Tuple
+from weakref import WeakKeyDictionary
+import networkx as nx
+import numpy as np
+from numba_compat import njit
+from datastructures import heap_push, heap_pop
+from dijkstra import get_csr
+from geo import _precompute_coords, _cheap_heuristic
+
+# Arrays CSR + coordenadas por grafo; seguem a matriz em cache de
+# dijkstra.get_csr, refeita quando o grafo muda
+_arrays_cache = WeakKeyDictionary()
+
+def graph_arrays(graph: nx.DiGraph):
+    """
+    Converte o grafo (uma vez) nos arrays usados pelo kernel.
+    
+    Args:
+        graph: Grafo dirigido e ponderado com coordenadas
+        
+    Returns:
+        Tupla (indptr, indices, weights, lats, lons, lista de nós,
+        mapeamento nó -> índice)
+    """
+    csr, nodes, node_index = get_csr(graph)
+    lats, lons, _ = _precompute_coords(graph)
+    cached = _arrays_cache.get(graph)
+    if cached is not None and cached[0] is csr and cached[1][3] is lats:
+        return cached[1]
+    
+    arrays = (csr.indptr.astype(np.int64), csr.indices.astype(np.int64),
+              csr.data.astype(np.float64), lats, lons, nodes, node_index)
+    
+    _arrays_cache[graph] = (csr, arrays)
+    return arrays
+
+@njit(cache=True)
+def _heuristic(lats, lons, node, goal):
+    """Heurística do kernel; coordenadas NaN (não numéricas) valem 0."""
+    lat1, lon1, lat2, lon2 = lats[node], lons[node], lats[goal], lons[goal]
+    if np.isnan(lat1 + lon1 + lat2 + lon2):
+        return 0.0
+    return _cheap_heuristic(lat1, lon1, lat2, lon2)
+
+@njit(cache=True)
+def astar_csr(indptr, indices, weights, lats, lons, start, goal):
+    """
+    Kernel do A* com lista fechada e remoção preguiçosa no heap.
+    
+    Returns:
+        Tupla (array de índices do caminho, distância); caminho vazio e
+        inf quando o destino é inalcançável
+    """
+    n = indptr.shape[0] - 1
+    g_score = np.full(n, np.inf)
+    predecessors = np.full(n, -1, dtype=np.int64)
+    visited = np.zeros(n, dtype=np.bool_)
+    
+    # Cada aresta é relaxada no máximo uma vez (ao fechar sua origem)
+    capacity = indices.shape[0] + 1
+    keys = np.empty(capacity, dtype=np.float64)
+    order = np.empty(capacity, dtype=np.int64)
+    items = np.empty(capacity, dtype=np.int64)
+    
+    g_score[start] = 0.0
+    size = heap_push(keys, order, items, 0, _heuristic(lats, lons, start, goal), 0, start)
+    seq = 1
+    
+    while size > 0:
+        _, current, size = heap_pop(keys, order, items, size)
+        
+        if visited[current]:
+            continue
+        
+        visited[current] = True
+        
+        if current == goal:
+            break
+        
+        for k in range(indptr[current], indptr[current + 1]):
+            neighbor = indices[k]
+            if visited[neighbor]:
+                continue
+            
+            tentative_g_score = g_score[current] + weights[k]
+            if tentative_g_score < g_score[neighbor]:
+                g_score[neighbor] = tentative_g_score
+                predecessors[neighbor] = current
+                size = heap_push(keys, order, items, size,
+                                 tentative_g_score + _heuristic(lats, lons, neighbor, goal),
+                                 seq, neighbor)
+                seq += 1
+    
+    if g_score[goal] == np.inf:
+        return np.empty(0, dtype=np.int64), np.inf
+    
+    length = 1
+    current = goal
+    while current != start:
+        current = predecessors[current]
+        length += 1
+    
+    path = np.empty(length, dtype=np.int64)
+    current = goal
+    for i in range(length - 1, -1, -1):
+        path[i] = current
+        current = predecessors[current]
+    
+    return path, g_score[goal]
+
+def find_path_a_star_numba(graph: nx.DiGraph,
+                           start: int,
+                           end: int) -> Tuple[List[int], float]:
+    """
+    Encontra o caminho mínimo com o kernel compilado.
+    
+    Args:
+        graph: Grafo dirigido e ponderado com coordenadas
+        start: Nó de origem
+        end: Nó de destino
+        
+    Returns:
+        Tupla (caminho, distância) ou ([], inf) se não houver caminho
+    """
+    if start == end:
+        return [start], 0.0
+    
+    if not graph.has_node(start) or not graph.has_node(end):
+        return [], float('inf')
+    
+    indptr, indices, weights, lats, lons, nodes, node_index = graph_arrays(graph)
+    path, distance = astar_csr(indptr, indices, weights, lats, lons,
+                               node_index[start], node_index[end])
+    
+    if len(path) == 0:
+        return [], float('inf')
+    
+    return [nodes[i] for i in path], float(distance)
@@ -3,24 +3,253 @@ Módulo para computação de matrizes de custo usando algoritmos de caminho mín
 Utiliza A* para eficiência na construção de matrizes de distância entre múltiplos nós.
 """
 
-from typing import List, Dict
+from typing import List, Dict, Optional, Callable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import io
+import multiprocessing
+import os
 import networkx as nx
 import numpy as np
-from a_star import find_path_a_star, get_shortest_distance_a_star
-from dijkstra import find_path_dijkstra, get_shortest_distance
+from scipy.sparse.csgraph import dijkstra as csgraph_dijkstra
+from a_star import (find_path_a_star, get_shortest_distance_a_star,
+                    get_node_coordinates, haversine_distance_vector)
+from dijkstra import (find_path_dijkstra, get_shortest_distance,
+                      single_source_dijkstra, reconstruct_path, get_csr,
+                      reconstruct_path_array)
+
+# A partir deste número de nós a matriz é calculada em paralelo, com uma
+# tarefa (linha de origem ou coluna de destino) por vez em cada processo
+PARALLEL_MIN_NODES = 64
+
+# Estado de cada processo do pool, preenchido uma única vez por _init_worker
+_worker_state = {}
+
+def _heuristic_matrix(graph: nx.DiGraph, targets: List[int]):
+    """
+    Pré-computa a heurística do A* de todos os nós do grafo para cada destino.
+    
+    Uma única chamada a haversine_distance_vector gera a matriz (V, n), em vez
+    de uma chamada escalar por expansão de nó em cada busca.
+    
+    Args:
+        graph: Grafo com coordenadas geográficas
+        targets: Nós de destino (colunas da matriz)
+        
+    Returns:
+        Tupla (lista de nós do grafo, matriz (V, n)) ou None se as coordenadas
+        não forem numéricas
+    """
+    graph_nodes = list(graph.nodes())
+    try:
+        coords = np.array([get_node_coordinates(graph, node) for node in graph_nodes],
+                          dtype=np.float64).reshape(-1, 2)
+        target_coords = np.array([get_node_coordinates(graph, node) for node in targets],
+                                 dtype=np.float64).reshape(-1, 2)
+    except (KeyError, TypeError, ValueError):
+        return None
+    
+    lats, lons = coords[:, 0], coords[:, 1]
+    matrix = haversine_distance_vector(lats[:, None], lons[:, None],
+                                       target_coords[None, :, 0], target_coords[None, :, 1])
+    return graph_nodes, matrix
+
+def _search_function(algorithm: str, use_paths: bool) -> Callable:
+    """Retorna a função de busca correspondente ao algoritmo escolhido."""
+    if algorithm.lower() == 'a_star':
+        return find_path_a_star if use_paths else get_shortest_distance_a_star
+    elif algorithm.lower() == 'dijkstra':
+        return find_path_dijkstra if use_paths else get_shortest_distance
+    raise ValueError(f"Algoritmo '{algorithm}' não suportado. Use 'a_star' ou 'dijkstra'")
+
+def _compute_column(graph: nx.DiGraph,
+                    search_func: Callable,
+                    target: int,
+                    sources: List[int],
+                    use_paths: bool,
+                    heuristic: Optional[Dict[int, float]] = None) -> List:
+    """
+    Calcula uma coluna da matriz: a distância de cada origem até um destino.
+    
+    Usada pelo A*, cuja heurística depende do destino e por isso é
+    compartilhada por todas as buscas da mesma coluna.
+    
+    Returns:
+        Lista de tuplas (origem, destino, distância, caminho) apenas para
+        pares alcançáveis
+    """
+    search_kwargs = {} if heuristic is None else {'heuristic': heuristic}
+    column = []
+    
+    for source in sources:
+        if source == target:
+            continue
+            
+        try:
+            if use_paths:
+                path, distance = search_func(graph, source, target, **search_kwargs)
+                if path:
+                    column.append((source, target, distance, path))
+            else:
+                distance = search_func(graph, source, target, **search_kwargs)
+                if distance != float('inf'):
+                    column.append((source, target, distance, None))
+                    
+        except Exception as e:
+            print(f"Aviso: Erro ao calcular distância de {source} para {target}: {e}")
+            continue
+    
+    return column
+
+def _compute_row(graph: nx.DiGraph,
+                 source: int,
+                 targets: List[int],
+                 use_paths: bool) -> List:
+    """
+    Calcula uma linha da matriz com uma única execução de Dijkstra a partir
+    da origem, em vez de uma busca por par.
+    
+    Returns:
+        Lista de tuplas (origem, destino, distância, caminho) apenas para
+        pares alcançáveis
+    """
+    try:
+        distances, predecessors = single_source_dijkstra(graph, source)
+    except Exception as e:
+        print(f"Aviso: Erro ao calcular distâncias a partir de {source}: {e}")
+        return []
+    
+    row = []
+    for target in targets:
+        distance = distances.get(target, float('inf'))
+        if target == source or distance == float('inf'):
+            continue
+        path = reconstruct_path(predecessors, source, target) if use_paths else None
+        row.append((source, target, distance, path))
+    
+    return row
+
+def _compute_csgraph(graph: nx.DiGraph,
+                     unique_nodes: List[int],
+                     use_paths: bool):
+    """
+    Calcula a matriz com Dijkstra do scipy.sparse.csgraph sobre o grafo em CSR.
+    
+    Uma única chamada em C resolve todas as origens; das V colunas de
+    distância, só as dos nós de interesse são mantidas.
+    
+    Returns:
+        Tupla (índices na matriz dos nós presentes no grafo, submatriz de
+        distâncias, dicionário de caminhos) ou None se houver pesos negativos
+    """
+    csr, graph_nodes, graph_index = get_csr(graph)
+    if csr.nnz and csr.data.min() < 0:
+        return None
+    
+    present = [i for i, node in enumerate(unique_nodes) if node in graph_index]
+    paths = {}
+    if not present:
+        return present, np.empty((0, 0)), paths
+    
+    idx = np.array([graph_index[unique_nodes[i]] for i in present], dtype=np.int64)
+    
+    if not use_paths:
+        distances = csgraph_dijkstra(csr, directed=True, indices=idx)
+        return present, distances[:, idx], paths
+    
+    distances, predecessors = csgraph_dijkstra(csr, directed=True, indices=idx,
+                                               return_predecessors=True)
+    distances = distances[:, idx]
+    for r, i in enumerate(present):
+        for c, j in enumerate(present):
+            if i == j or distances[r, c] == np.inf:
+                continue
+            paths[(unique_nodes[i], unique_nodes[j])] = reconstruct_path_array(
+                predecessors[r], graph_nodes, idx[r], idx[c])
+    
+    return present, distances, paths
+
+def _init_worker(graph: nx.DiGraph, graph_nodes: Optional[List[int]]) -> None:
+    """Recebe o grafo uma única vez por processo, evitando serializá-lo a cada tarefa."""
+    _worker_state['graph'] = graph
+    _worker_state['graph_nodes'] = graph_nodes
+
+def _compute_task(algorithm: str,
+                  use_paths: bool,
+                  node: int,
+                  nodes: List[int],
+                  heuristic_column: Optional[np.ndarray]) -> List:
+    """Tarefa executada no pool: uma linha (Dijkstra) ou coluna (A*) da matriz."""
+    graph = _worker_state['graph']
+    
+    if algorithm.lower() == 'dijkstra':
+        return _compute_row(graph, node, nodes, use_paths)
+    
+    heuristic = None
+    if heuristic_column is not None:
+        heuristic = dict(zip(_worker_state['graph_nodes'], heuristic_column.tolist()))
+    
+    return _compute_column(graph, _search_function(algorithm, use_paths),
+                           node, nodes, use_paths, heuristic)
+
+def _compute_parallel(graph: nx.DiGraph,
+                      algorithm: str,
+                      use_paths: bool,
+                      unique_nodes: List[int],
+                      heuristics,
+                      max_workers: int) -> Optional[List]:
+    """
+    Distribui as linhas/colunas da matriz entre processos.
+    
+    O pool usa o contexto 'spawn': processos criados por fork herdariam o
+    estado das threads já iniciadas (ex.: Numba) e poderiam travar.
+    
+    Returns:
+        Lista de resultados das tarefas ou None se o pool de processos não
+        puder ser usado (a chamada volta ao modo sequencial)
+    """
+    graph_nodes = heuristics[0] if heuristics is not None else None
+    
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers,
+                                 mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker,
+                                 initargs=(graph, graph_nodes)) as executor:
+            futures = []
+            for j, node in enumerate(unique_nodes):
+                heuristic_column = heuristics[1][:, j] if heuristics is not None else None
+                futures.append(executor.submit(_compute_task, algorithm, use_paths,
+                                               node, unique_nodes, heuristic_column))
+            return [future.result() for future in futures]
+    except (OSError, NotImplementedError, BrokenProcessPool) as e:
+        print(f"Aviso: Execução paralela indisponível ({e}), calculando sequencialmente")
+        return None
 
 def compute_cost_matrix(graph: nx.DiGraph, 
                        nodes: List[int], 
                        algorithm: str = 'a_star',
-                       use_paths: bool = False) -> Dict:
+                       use_paths: bool = False,
+                       max_workers: Optional[int] = None,
+                       dtype=np.float64) -> Dict:
     """
     Computa uma matriz de custo entre múltiplos nós do grafo.
     
+    Com Dijkstra a matriz inteira vem de uma chamada ao scipy.sparse.csgraph
+    sobre o grafo em CSR (com pesos negativos, volta a uma busca por linha);
+    com A* cada coluna reaproveita a heurística do destino. Linhas/colunas
+    são independentes e, com PARALLEL_MIN_NODES nós ou mais, são
+    distribuídas entre processos.
+    
     Args:
         graph: Grafo dirigido e ponderado
         nodes: Lista de nós para incluir na matriz
         algorithm: 'a_star' ou 'dijkstra' para escolher o algoritmo
         use_paths: Se True, também retorna os caminhos completos
+        max_workers: Número de processos (padrão: os.cpu_count()); 1 força
+            a execução sequencial
+        dtype: Tipo da matriz. np.float32 reduz memória pela metade e
+            preserva ~7 dígitos significativos (centímetros em distâncias
+            urbanas em metros); validate_cost_matrix aceita ambos
         
     Returns:
         Dicionário com:
@@ -36,39 +265,56 @@ def compute_cost_matrix(graph: nx.DiGraph,
     
     node_index = {node: i for i, node in enumerate(unique_nodes)}
     
-    cost_matrix = np.full((n, n), np.inf)
+    cost_matrix = np.full((n, n), np.inf, dtype=dtype)
     np.fill_diagonal(cost_matrix, 0.0) 
     
     paths = {}
+    search_func = _search_function(algorithm, use_paths)
+    heuristics = _heuristic_matrix(graph, unique_nodes) if algorithm.lower() == 'a_star' else None
     
-    if algorithm.lower() == 'a_star':
-        search_func = find_path_a_star if use_paths else get_shortest_distance_a_star
-    elif algorithm.lower() == 'dijkstra':
-        search_func = find_path_dijkstra if use_paths else get_shortest_distance
-    else:
-        raise ValueError(f"Algoritmo '{algorithm}' não suportado. Use 'a_star' ou 'dijkstra'")
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
     
     print(f"Computando matriz de custo {n}x{n} usando {algorithm.upper()}...")
     
-    for i, source in enumerate(unique_nodes):
-        for j, target in enumerate(unique_nodes):
-            if i == j:
-                continue
-                
-            try:
-                if use_paths:
-                    path, distance = search_func(graph, source, target)
-                    if path:  
-                        cost_matrix[i, j] = distance
-                        paths[(source, target)] = path
-                else:
-                    distance = search_func(graph, source, target)
-                    if distance != float('inf'):
-                        cost_matrix[i, j] = distance
-                        
-            except Exception as e:
-                print(f"Aviso: Erro ao calcular distância de {source} para {target}: {e}")
+    results = None
+    if algorithm.lower() == 'dijkstra':
+        csgraph_result = _compute_csgraph(graph, unique_nodes, use_paths)
+        if csgraph_result is not None:
+            present, distances, paths = csgraph_result
+            cost_matrix[np.ix_(present, present)] = distances
+            results = []
+    
+    if results is None and n >= PARALLEL_MIN_NODES and max_workers > 1:
+        results = _compute_parallel(graph, algorithm, use_paths, unique_nodes,
+                                    heuristics, max_workers)
+    
+    if results is None:
+        results = []
+        for j, node in enumerate(unique_nodes):
+            if algorithm.lower() == 'dijkstra':
+                results.append(_compute_row(graph, node, unique_nodes, use_paths))
                 continue
+            heuristic = None
+            if heuristics is not None:
+                graph_nodes, heuristic_matrix = heuristics
+                heuristic = dict(zip(graph_nodes, heuristic_matrix[:, j].tolist()))
+            results.append(_compute_column(graph, search_func, node, unique_nodes,
+                                           use_paths, heuristic))
+    
+    # Uma única atribuição indexada em vez de uma escrita por célula
+    rows, cols, values = [], [], []
+    for entries in results:
+        for source, target, distance, path in entries:
+            rows.append(node_index[source])
+            cols.append(node_index[target])
+            values.append(distance)
+            if use_paths:
+                paths[(source, target)] = path
+    
+    if values:
+        cost_matrix[np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)] = \
+            np.array(values, dtype=dtype)
     
     result = {
         'matrix': cost_matrix,
@@ -85,8 +331,12 @@ def compute_cost_matrix_symmetric(graph: nx.DiGraph,
                                  nodes: List[int], 
                                  algorithm: str = 'a_star') -> Dict:
     """
-    Computa uma matriz de custo simétrica (assume que distância A->B = B->A).
-    Mais eficiente que a versão completa, mas pode não ser precisa para grafos dirigidos.
+    Computa uma matriz de custo simétrica.
+    
+    Em grafos dirigidos calcula a matriz completa uma única vez e simetriza
+    com o menor custo entre os dois sentidos (np.minimum(D, D.T)). Em grafos
+    não dirigidos as distâncias já são simétricas: com A* só o triângulo
+    superior é buscado e depois espelhado.
     
     Args:
         graph: Grafo dirigido e ponderado
@@ -99,20 +349,28 @@ def compute_cost_matrix_symmetric(graph: nx.DiGraph,
     if not nodes:
         return {'matrix': np.array([]), 'node_index': {}, 'nodes': []}
     
+    if algorithm.lower() not in ('a_star', 'dijkstra'):
+        raise ValueError(f"Algoritmo '{algorithm}' não suportado")
+    
     unique_nodes = list(dict.fromkeys(nodes))
     n = len(unique_nodes)
     node_index = {node: i for i, node in enumerate(unique_nodes)}
     
+    if graph.is_directed() or algorithm.lower() == 'dijkstra':
+        full_matrix = compute_cost_matrix(graph, unique_nodes, algorithm)['matrix']
+        if graph.is_directed():
+            cost_matrix = np.minimum(full_matrix, full_matrix.T)
+        else:
+            cost_matrix = full_matrix
+        return {
+            'matrix': cost_matrix,
+            'node_index': node_index,
+            'nodes': unique_nodes
+        }
+    
     cost_matrix = np.full((n, n), np.inf)
     np.fill_diagonal(cost_matrix, 0.0)
     
-    if algorithm.lower() == 'a_star':
-        search_func = get_shortest_distance_a_star
-    elif algorithm.lower() == 'dijkstra':
-        search_func = get_shortest_distance
-    else:
-        raise ValueError(f"Algoritmo '{algorithm}' não suportado")
-    
     print(f"Computando matriz simétrica {n}x{n} usando {algorithm.upper()}...")
     
     for i in range(n):
@@ -121,15 +379,18 @@ def compute_cost_matrix_symmetric(graph: nx.DiGraph,
             target = unique_nodes[j]
             
             try:
-                distance = search_func(graph, source, target)
+                distance = get_shortest_distance_a_star(graph, source, target)
                 if distance != float('inf'):
                     cost_matrix[i, j] = distance
-                    cost_matrix[j, i] = distance
                     
             except Exception as e:
                 print(f"Aviso: Erro ao calcular distância de {source} para {target}: {e}")
                 continue
     
+    # Espelha o triângulo superior em um único passo
+    upper = np.triu(cost_matrix, 1)
+    cost_matrix = np.triu(cost_matrix) + upper.T
+    
     return {
         'matrix': cost_matrix,
         'node_index': node_index,
@@ -172,21 +433,21 @@ def validate_cost_matrix(cost_matrix: np.ndarray,
     Returns:
         True se a matriz é válida, False caso contrário
     """
-    if cost_matrix is None or len(cost_matrix) == 0:
+    if cost_matrix is None or cost_matrix.size == 0:
         return False
     
-    n = len(cost_matrix)
-    
-    if cost_matrix.shape != (n, n):
+    if cost_matrix.ndim != 2 or cost_matrix.shape[0] != cost_matrix.shape[1]:
         return False
     
-    if not np.allclose(np.diag(cost_matrix), 0.0):
+    # Verificações O(1) e O(n) antes da passada O(n²)
+    if len(node_index) != cost_matrix.shape[0]:
         return False
     
-    if np.any(cost_matrix < 0):
+    if not np.allclose(np.diagonal(cost_matrix), 0.0):
         return False
     
-    if len(node_index) != n:
+    # min() percorre a matriz uma vez sem alocar a máscara booleana n x n
+    if cost_matrix.min() < 0:
         return False
     
     return True
@@ -206,23 +467,20 @@ def print_cost_matrix(cost_matrix: np.ndarray,
         print("Matriz de custo vazia")
         return
     
-    n = len(cost_matrix)
     nodes = [node for node, _ in sorted(node_index.items(), key=lambda x: x[1])]
     
-    print("Matriz de Custo:")
-    print("     ", end="")
-    for node in nodes:
-        print(f"{node:8}", end="")
-    print()
-    
-    for i, source in enumerate(nodes):
-        print(f"{source:4}: ", end="")
-        for j, target in enumerate(nodes):
-            if cost_matrix[i, j] == float('inf'):
-                print("     inf", end="")
-            else:
-                print(f"{cost_matrix[i, j]:8.{precision}f}", end="")
-        print()
+    # Monta a tabela inteira em memória e escreve de uma vez só
+    buffer = io.StringIO()
+    buffer.write("Matriz de Custo:\n")
+    buffer.write("     " + "".join(f"{node:8}" for node in nodes) + "\n")
+    
+    for source, row in zip(nodes, cost_matrix.tolist()):
+        buffer.write(f"{source:4}: ")
+        buffer.write("".join("     inf" if value == float('inf') else f"{value:8.{precision}f}"
+                             for value in row))
+        buffer.write("\n")
+    
+    print(buffer.getvalue(), end="")
 
 def export_cost_matrix(cost_matrix: np.ndarray, 
                       node_index: Dict[int, int],
@@ -230,22 +488,30 @@ def export_cost_matrix(cost_matrix: np.ndarray,
     """
     Exporta a matriz de custo para um arquivo CSV.
     
+    A formatação numérica é feita por np.savetxt (laço em C) em um único
+    buffer; o arquivo mantém o cabeçalho com os nós, a coluna de rótulos
+    e células vazias onde não há caminho.
+    
     Args:
         cost_matrix: Matriz de custo
         node_index: Mapeamento de nó para índice
         filename: Nome do arquivo de saída
     """
-    import pandas as pd
-    
-    if cost_matrix is None or len(cost_matrix) == 0:
+    if cost_matrix is None or cost_matrix.size == 0:
         print("Matriz de custo vazia, não é possível exportar")
         return
     
     nodes = [node for node, _ in sorted(node_index.items(), key=lambda x: x[1])]
     
-    df = pd.DataFrame(cost_matrix, index=nodes, columns=nodes)
+    buffer = io.StringIO()
+    # Dígitos suficientes para reler exatamente o valor de cada dtype
+    fmt = '%.9g' if cost_matrix.dtype == np.float32 else '%.17g'
+    np.savetxt(buffer, cost_matrix, delimiter=',', fmt=fmt)
+    # Células sem caminho ficam vazias
+    text = buffer.getvalue().replace('-inf', '').replace('inf', '').replace('nan', '')
     
-    df = df.replace([np.inf, -np.inf], '')
+    with open(filename, 'w') as f:
+        f.write(','.join([''] + [str(node) for node in nodes]) + '\n')
+        f.writelines(f"{node},{row}\n" for node, row in zip(nodes, text.splitlines()))
     
-    df.to_csv(filename)
     print(f"Matriz de custo exportada para '{filename}'")
@@ -1,27 +1,50 @@
 import heapq
 import collections
+import itertools
+from numba_compat import njit
 
 class filaPrioridade:
   """Implementa uma fila de prioridade usando heapq.
   É a estrutura de dados central para maior eficiência de Dijkstra e A*
+
+  As entradas são (prioridade, contador, item): o contador desempata
+  prioridades iguais em ordem FIFO e evita comparar os próprios itens.
   """
 
   def __init__(self):
     self.elements = []
+    self._counter = itertools.count()
 
   def is_empty(self):
     return not self.elements
     
   def put(self, item, prioridade):
     """Adiciona um item à fila com uma certa prioridade."""
-    heapq.heappush(self.elements, (prioridade, item))
+    heapq.heappush(self.elements, (prioridade, next(self._counter), item))
 
   def get(self):
     """Remove e retorna o item com a menor prioridade."""
-    return heapq.heappop(self.elements)[1]
+    return heapq.heappop(self.elements)[2]
+
+  def peek_priority(self):
+    """Retorna a menor prioridade da fila sem remover o item."""
+    return self.elements[0][0]
+
+  def __len__(self):
+    return len(self.elements)
+
+  def truncate(self, max_size):
+    """Mantém apenas os max_size itens de menor prioridade, descartando o resto."""
+    if len(self.elements) > max_size:
+      # nsmallest devolve uma lista ordenada, que já é um heap válido
+      self.elements = heapq.nsmallest(max_size, self.elements)
 
 class Fila:
-  """Implementa uma fila padrão FIFO(gerenciar pedidos de entrega)"""
+  """Implementa uma fila padrão FIFO(gerenciar pedidos de entrega)
+
+  Usa collections.deque: enqueue/dequeue são O(1), ao contrário de
+  list.pop(0), que desloca todo o array a cada remoção.
+  """
   def __init__(self):
     self.elements = collections.deque()
 
@@ -33,11 +56,14 @@ class Fila:
     self.elements.append(item)
 
   def dequeue(self):
-    """Remove e retorna o item do início da fila."""
+    """Remove e retorna o item do início da fila (IndexError se vazia)."""
     return self.elements.popleft()
     
 class Pilha:
-  """Implementa uma pilha padrão LIFO(para reconstruir os caminhos encontrados pelos algoritmos)"""
+  """Implementa uma pilha padrão LIFO(para reconstruir os caminhos encontrados pelos algoritmos)
+
+  Uma list basta aqui: append/pop no final já são O(1) amortizado.
+  """
   def __init__(self):
     self.elements = []
 
@@ -50,4 +76,59 @@ class Pilha:
 
   def pop(self):
     """Remove e retorna o item do topo da pilha."""
-    return self.elements.pop()
\ No newline at end of file
+    return self.elements.pop()
+
+# Heap binário sobre arrays pré-alocados, para os kernels compilados com
+# Numba (que não aceitam filaPrioridade). Cada entrada ocupa a mesma posição
+# em keys/order/items e é comparada por (chave, ordem de inserção), com o
+# mesmo desempate FIFO de filaPrioridade. As funções recebem o tamanho atual
+# e devolvem o novo tamanho.
+
+@njit(cache=True)
+def heap_push(keys, order, items, size, key, seq, item):
+  """Insere (key, seq, item) no heap de tamanho size; retorna o novo tamanho."""
+  # Sobe a "lacuna" até a posição final e escreve a entrada uma única vez
+  i = size
+  while i > 0:
+    parent = (i - 1) >> 1
+    if key > keys[parent] or (key == keys[parent] and seq > order[parent]):
+      break
+    keys[i] = keys[parent]
+    order[i] = order[parent]
+    items[i] = items[parent]
+    i = parent
+  keys[i] = key
+  order[i] = seq
+  items[i] = item
+  return size + 1
+
+@njit(cache=True)
+def heap_pop(keys, order, items, size):
+  """Remove a menor entrada; retorna (chave, item, novo tamanho)."""
+  key = keys[0]
+  item = items[0]
+  size -= 1
+  if size > 0:
+    # Desce a lacuna da raiz com a última entrada
+    last_key = keys[size]
+    last_seq = order[size]
+    last_item = items[size]
+    i = 0
+    while True:
+      child = 2 * i + 1
+      if child >= size:
+        break
+      right = child + 1
+      if right < size and (keys[right] < keys[child] or
+                           (keys[right] == keys[child] and order[right] < order[child])):
+        child = right
+      if last_key < keys[child] or (last_key == keys[child] and last_seq < order[child]):
+        break
+      keys[i] = keys[child]
+      order[i] = order[child]
+      items[i] = items[child]
+      i = child
+    keys[i] = last_key
+    order[i] = last_seq
+    items[i] = last_item
+  return key, item, size
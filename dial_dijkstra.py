@@ -0,0 +1,129 @@
+"""
+Dijkstra com fila de baldes (algoritmo de Dial) sobre o grafo em arrays CSR.
+Para pesos inteiros pequenos (em unidades de 1/SCALE) a fila de prioridade
+vira um vetor circular de baldes: inserir e remover custam O(1), sem heap.
+Usado por find_path_dijkstra quando todos os pesos caem na grade 1/SCALE.
+"""
+
+import numpy as np
+from numba_compat import njit
+
+# Resolução da grade de pesos (centésimos de metro/segundo)
+SCALE = 100
+
+# Maior peso de aresta aceito, em larguras de balde: o vetor circular tem
+# esse tamanho e a varredura de baldes vazios cresce com ele
+MAX_BUCKETS = 1024
+
+
+def dial_weights(weights: np.ndarray):
+    """
+    Converte os pesos para unidades inteiras de balde, se possível.
+
+    Os pesos são levados à grade 1/SCALE e divididos pelo maior divisor
+    comum (a largura do balde), de modo que pesos todos iguais a 1.0 viram
+    unidades de valor 1.
+
+    Args:
+        weights: Pesos das arestas (dados da matriz CSR)
+
+    Returns:
+        Tupla (unidades int64, número de baldes) ou None se algum peso for
+        negativo, estiver fora da grade ou exigir mais de MAX_BUCKETS baldes
+    """
+    if weights.size == 0 or weights.min() < 0:
+        return None
+
+    ticks = np.rint(weights * SCALE)
+    if ticks.max() > np.iinfo(np.int64).max // 2 or np.any(ticks / SCALE != weights):
+        return None
+
+    ticks = ticks.astype(np.int64)
+    delta = int(np.gcd.reduce(ticks)) or 1
+    units = ticks // delta
+
+    max_units = int(units.max())
+    if max_units >= MAX_BUCKETS:
+        return None
+
+    return units, max_units + 1
+
+@njit(cache=True)
+def dial_csr(indptr, indices, weights, units, num_buckets, source, target):
+    """
+    Kernel de Dijkstra com baldes circulares e remoção preguiçosa.
+
+    As prioridades usam as unidades inteiras; as distâncias devolvidas são
+    somadas com os pesos originais ao longo da árvore de caminhos.
+
+    Args:
+        indptr, indices, weights: Arrays da matriz CSR do grafo
+        units: Pesos em unidades de balde (ver dial_weights)
+        num_buckets: Tamanho do vetor circular (maior unidade + 1)
+        source: Índice do nó de origem
+        target: Índice do nó de destino (-1 calcula todos os nós)
+
+    Returns:
+        Tupla (distâncias, predecessores) indexados pela posição do nó;
+        predecessor -1 indica nó sem predecessor
+    """
+    n = indptr.shape[0] - 1
+    distances = np.full(n, np.inf)
+    predecessors = np.full(n, -1, dtype=np.int64)
+    keys = np.full(n, -1, dtype=np.int64)
+    visited = np.zeros(n, dtype=np.bool_)
+
+    # Cada balde é uma lista encadeada sobre um conjunto de entradas; cada
+    # aresta gera no máximo uma entrada (ao fechar sua origem)
+    capacity = indices.shape[0] + 1
+    entry_node = np.empty(capacity, dtype=np.int64)
+    entry_next = np.empty(capacity, dtype=np.int64)
+    heads = np.full(num_buckets, -1, dtype=np.int64)
+
+    distances[source] = 0.0
+    keys[source] = 0
+    entry_node[0] = source
+    entry_next[0] = -1
+    heads[0] = 0
+    used = 1
+    pending = 1
+    current_key = 0
+
+    while pending > 0:
+        bucket = current_key % num_buckets
+        while heads[bucket] == -1:
+            current_key += 1
+            bucket = current_key % num_buckets
+
+        entry = heads[bucket]
+        heads[bucket] = entry_next[entry]
+        pending -= 1
+        current = entry_node[entry]
+
+        if visited[current] or keys[current] != current_key:
+            continue
+
+        visited[current] = True
+
+        if current == target:
+            break
+
+        for k in range(indptr[current], indptr[current + 1]):
+            neighbor = indices[k]
+            if visited[neighbor]:
+                continue
+
+            new_key = current_key + units[k]
+            if keys[neighbor] == -1 or new_key < keys[neighbor]:
+                keys[neighbor] = new_key
+                distances[neighbor] = distances[current] + weights[k]
+                predecessors[neighbor] = current
+
+                slot = new_key % num_buckets
+                entry_node[used] = neighbor
+                entry_next[used] = heads[slot]
+                heads[slot] = used
+                used += 1
+                pending += 1
+
+    return distances, predecessors
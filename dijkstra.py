@@ -4,15 +4,41 @@ Utiliza heap (fila de prioridade) para eficiência O((V + E) log V).
 """
 
 from typing import List, Dict, Tuple, Optional, Set
+from weakref import WeakKeyDictionary
 import networkx as nx
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra as csgraph_dijkstra
 from datastructures import filaPrioridade, Pilha
+from numba_compat import NUMBA_AVAILABLE, get_num_threads
+from dijkstra_numba import dijkstra_csr, path_indices
+from dial_dijkstra import dial_csr, dial_weights
+from delta_stepping import default_delta, multi_source_delta_stepping
+
+# Representação CSR por grafo (ver get_csr), com a assinatura do grafo no
+# momento da montagem; a entrada some junto com o grafo
+_csr_cache = WeakKeyDictionary()
+
+# Arrays int64 da CSR para o kernel compilado, por grafo, junto com a matriz
+# de origem (refeitos quando a matriz recebida é outra)
+_kernel_arrays_cache = WeakKeyDictionary()
+
+# Pesos em unidades de balde para o algoritmo de Dial (ou None se inviável)
+_dial_cache = WeakKeyDictionary()
+
+# Threads mínimas para multi_source_distances usar o delta-stepping paralelo:
+# em uma thread ele é ~3x mais lento que o csgraph
+_PARALLEL_MIN_THREADS = 4
 
 
 def find_path_dijkstra(graph: nx.DiGraph,
                        start: int,
-                       end: int) -> Tuple[List[int], float]:
+                       end: int,
+                       csr: Optional[Tuple[csr_matrix, List[int], Dict[int, int]]] = None) -> Tuple[List[int], float]:
     """
     Encontra o caminho mínimo entre dois nós usando o algoritmo de Dijkstra.
+    
+    'csr' (opcional) é a tupla de get_csr guardada pelo chamador; ver get_csr.
     """
     if start == end:
         return [start], 0.0
@@ -20,6 +46,132 @@ def find_path_dijkstra(graph: nx.DiGraph,
     if not graph.has_node(start) or not graph.has_node(end):
         return [], float('inf')
 
+    matrix, nodes, node_index = csr if csr is not None else get_csr(graph)
+    start_index, end_index = node_index[start], node_index[end]
+    result = _csr_search(graph, matrix, start_index, end_index)
+
+    if result is not None:
+        distances, predecessors = result
+        if distances[end_index] == np.inf:
+            return [], float('inf')
+        path = reconstruct_path_array(predecessors, nodes, start_index, end_index)
+        return path, float(distances[end_index])
+
+    # Pesos negativos não são aceitos pelos kernels: usa a busca em Python
+    distances, predecessors = single_source_dijkstra(graph, start, end)
+
+    if distances[end] == float('inf'):
+        return [], float('inf')
+
+    path = reconstruct_path(predecessors, start, end)
+    return path, distances[end]
+
+def _csr_search(graph: nx.DiGraph, csr: csr_matrix, start_index: int, end_index: int):
+    """
+    Busca sobre a matriz CSR: kernel compilado (com parada no destino)
+    quando o Numba está disponível, senão o Dijkstra do csgraph. Com Numba,
+    pesos na grade de dial_dijkstra usam a fila de baldes em vez do heap.
+    
+    Returns:
+        Tupla (distâncias, predecessores) por índice ou None se o grafo tiver
+        pesos negativos
+    """
+    indptr, indices, weights, has_negative = _kernel_arrays(graph, csr)
+    if has_negative:
+        return None
+    
+    if NUMBA_AVAILABLE:
+        dial = _dial_arrays(graph, csr)
+        if dial is not None:
+            units, num_buckets = dial
+            return dial_csr(indptr, indices, weights, units, num_buckets,
+                            start_index, end_index)
+        return dijkstra_csr(indptr, indices, weights, start_index, end_index)
+    
+    return csgraph_dijkstra(csr, directed=True, indices=start_index,
+                            return_predecessors=True)
+
+def get_shortest_distance_by_index(graph: nx.DiGraph,
+                                   start_index: int,
+                                   end_index: int,
+                                   csr: Optional[Tuple[csr_matrix, List[int], Dict[int, int]]] = None) -> float:
+    """
+    Distância mínima entre dois nós dados pelas posições na CSR de get_csr.
+    
+    Evita as buscas em dicionário por nó quando o chamador já guarda o
+    mapeamento nó -> índice (ex.: consultas repetidas sobre o mesmo grafo).
+    
+    Args:
+        graph: Grafo dirigido e ponderado
+        start_index: Índice do nó de origem
+        end_index: Índice do nó de destino
+        csr: (opcional) Tupla de get_csr guardada pelo chamador; ver get_csr
+        
+    Returns:
+        Distância mínima ou float('inf') se não houver caminho
+    """
+    if start_index == end_index:
+        return 0.0
+    
+    matrix, nodes, _ = csr if csr is not None else get_csr(graph)
+    result = _csr_search(graph, matrix, start_index, end_index)
+    if result is None:
+        distances, _ = single_source_dijkstra(graph, nodes[start_index], nodes[end_index])
+        return distances[nodes[end_index]]
+    
+    return float(result[0][end_index])
+
+def multi_source_distances(graph: nx.DiGraph,
+                           source_indices: np.ndarray,
+                           csr: Optional[Tuple[csr_matrix, List[int], Dict[int, int]]] = None) -> Optional[np.ndarray]:
+    """
+    Distâncias de várias origens para todos os nós em uma única chamada.
+    
+    Com Numba e ao menos _PARALLEL_MIN_THREADS threads, as origens são
+    repartidas entre as threads (delta-stepping, uma busca por origem); caso
+    contrário usa o Dijkstra do csgraph, que processa as origens em sequência.
+    
+    Args:
+        graph: Grafo dirigido e ponderado
+        source_indices: Índices (na CSR de get_csr) dos nós de origem
+        csr: (opcional) Tupla de get_csr guardada pelo chamador; ver get_csr
+        
+    Returns:
+        Matriz (origens, V) de distâncias ou None se o grafo tiver pesos
+        negativos
+    """
+    matrix = csr[0] if csr is not None else get_csr(graph)[0]
+    indptr, indices, weights, has_negative = _kernel_arrays(graph, matrix)
+    if has_negative:
+        return None
+    
+    source_indices = np.asarray(source_indices, dtype=np.int64)
+    if source_indices.size == 0:
+        return np.empty((0, matrix.shape[0]))
+    
+    if NUMBA_AVAILABLE and source_indices.size > 1 and get_num_threads() >= _PARALLEL_MIN_THREADS:
+        return multi_source_delta_stepping(indptr, indices, weights, source_indices,
+                                           default_delta(weights))
+    
+    return csgraph_dijkstra(matrix, directed=True, indices=source_indices)
+
+def single_source_dijkstra(graph: nx.DiGraph,
+                           start: int,
+                           end: Optional[int] = None) -> Tuple[Dict[int, float], Dict[int, Optional[int]]]:
+    """
+    Executa Dijkstra a partir de uma origem, opcionalmente parando em 'end'.
+    
+    Uma única execução sem 'end' fornece as distâncias e predecessores para
+    todos os destinos, o que permite montar uma linha inteira da matriz de custo.
+    
+    Args:
+        graph: Grafo dirigido e ponderado
+        start: Nó de origem
+        end: (opcional) Nó de destino para encerrar a busca mais cedo
+        
+    Returns:
+        Tupla (distâncias, predecessores) indexados por nó
+    """
     distances = {node: float('inf') for node in graph.nodes()}
     predecessors = {node: None for node in graph.nodes()}
     visited = set()
@@ -86,11 +238,180 @@ def find_path_dijkstra(graph: nx.DiGraph,
                     priority_queue.put(neighbor, new_distance)
         # --- FIM DA CORREÇÃO ---
 
-    if distances[end] == float('inf'):
-        return [], float('inf')
+    return distances, predecessors
 
-    path = reconstruct_path(predecessors, start, end)
-    return path, distances[end]
+def graph_to_csr(graph: nx.DiGraph) -> Tuple[csr_matrix, List[int], Dict[int, int]]:
+    """
+    Converte o grafo para uma matriz de adjacência esparsa (CSR).
+    
+    Segue as mesmas regras de peso de single_source_dijkstra: usa 'length'
+    ou 'weight', arestas paralelas de um MultiDiGraph ficam com o menor
+    peso e arestas de peso infinito são descartadas. Arestas de peso zero
+    são mantidas como entradas explícitas da matriz.
+    
+    Quando a primeira aresta tem 'length' (grafos do OSMnx) os pesos são
+    lidos direto dessa chave; se alguma aresta não a tiver, a leitura volta
+    para a regra geral.
+    
+    Args:
+        graph: Grafo dirigido e ponderado
+        
+    Returns:
+        Tupla (matriz CSR V x V, lista de nós, mapeamento nó -> índice)
+    """
+    nodes = list(graph.nodes())
+    node_index = {node: i for i, node in enumerate(nodes)}
+    edges = graph.edges(data=True)
+    
+    weights = None
+    if _weight_key(graph) == 'length':
+        try:
+            weights = [data['length'] for _, _, data in edges]
+        except KeyError:
+            weights = None
+    if weights is None:
+        default_weight = float('inf') if graph.is_multigraph() else 1.0
+        weights = [data.get('length', data.get('weight', default_weight)) for _, _, data in edges]
+    
+    m = len(weights)
+    weights = np.asarray(weights, dtype=np.float64)
+    src = np.fromiter((node_index[u] for u, _ in graph.edges()), dtype=np.int64, count=m)
+    dst = np.fromiter((node_index[v] for _, v in graph.edges()), dtype=np.int64, count=m)
+    
+    finite = weights != np.inf
+    src, dst, weights = src[finite], dst[finite], weights[finite]
+    if not graph.is_directed():
+        src, dst = np.concatenate([src, dst]), np.concatenate([dst, src])
+        weights = np.concatenate([weights, weights])
+    
+    return _csr_from_edges(len(nodes), src, dst, weights), nodes, node_index
+
+def _weight_key(graph: nx.DiGraph) -> Optional[str]:
+    """'length' se a primeira aresta tiver essa chave, senão None (regra geral)."""
+    first = next(iter(graph.edges(data=True)), None)
+    return 'length' if first is not None and 'length' in first[2] else None
+
+def _csr_from_edges(n: int, src: np.ndarray, dst: np.ndarray, weights: np.ndarray) -> csr_matrix:
+    """Matriz CSR n x n das arestas, ficando com o menor peso de cada par (origem, destino)."""
+    # Ordena por (origem, destino, peso) e fica com o primeiro de cada par
+    order = np.lexsort((weights, dst, src))
+    src, dst, weights = src[order], dst[order], weights[order]
+    first = np.ones(len(src), dtype=bool)
+    first[1:] = (src[1:] != src[:-1]) | (dst[1:] != dst[:-1])
+    
+    return csr_matrix((weights[first], (src[first], dst[first])), shape=(n, n))
+
+def csr_from_soa(soa: Dict[str, np.ndarray]) -> Tuple[csr_matrix, List[int], Dict[int, int]]:
+    """
+    Monta a matriz CSR a partir dos arrays de GraphParser.to_soa, sem
+    percorrer o grafo do NetworkX.
+    
+    Arestas paralelas ficam com o menor peso, como em graph_to_csr.
+    
+    Args:
+        soa: Dicionário com 'node_ids', 'edge_src', 'edge_dst' e 'edge_len'
+        
+    Returns:
+        Tupla (matriz CSR V x V, lista de nós, mapeamento nó -> índice)
+    """
+    nodes = soa['node_ids'].tolist()
+    node_index = {node: i for i, node in enumerate(nodes)}
+    csr = _csr_from_edges(len(nodes), soa['edge_src'], soa['edge_dst'], soa['edge_len'])
+    
+    return csr, nodes, node_index
+
+def get_csr(graph: nx.DiGraph,
+            soa: Optional[Dict[str, np.ndarray]] = None) -> Tuple[csr_matrix, List[int], Dict[int, int]]:
+    """
+    Versão com cache de graph_to_csr.
+    
+    A cache guarda a assinatura do grafo (graph_signature) e é refeita
+    sempre que nós, arestas ou pesos mudam, então o resultado corresponde
+    ao grafo atual. Conferir a assinatura percorre as arestas; quem mantém
+    um grafo que não muda (ex.: os gerenciadores de alocação e de VRP) guarda
+    a tupla devolvida e a repassa pelo parâmetro 'csr' das funções de busca.
+    
+    Args:
+        graph: Grafo dirigido e ponderado
+        soa: Arrays de GraphParser.to_soa do mesmo grafo; se informados,
+            a matriz é montada a partir deles (csr_from_soa)
+        
+    Returns:
+        Tupla (matriz CSR V x V, lista de nós, mapeamento nó -> índice)
+    """
+    signature = graph_signature(graph)
+    cached = _csr_cache.get(graph)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    
+    result = csr_from_soa(soa) if soa is not None else graph_to_csr(graph)
+    _csr_cache[graph] = (signature, result)
+    return result
+
+def graph_signature(graph: nx.DiGraph) -> Tuple[int, int, int]:
+    """
+    Assinatura de nós, arestas e pesos do grafo, usada para invalidar caches.
+    
+    Muda quando um nó ou aresta é adicionado ou removido e quando 'length'
+    ou 'weight' de uma aresta é alterado no próprio dicionário.
+    
+    Args:
+        graph: Grafo dirigido e ponderado
+        
+    Returns:
+        Tupla (número de nós, número de arestas, hash das arestas e pesos)
+    """
+    edges = tuple((u, v, data.get('length'), data.get('weight'))
+                  for u, v, data in graph.edges(data=True))
+    return graph.number_of_nodes(), len(edges), hash(edges)
+
+def _kernel_arrays(graph: nx.DiGraph, csr: csr_matrix):
+    """
+    Arrays (indptr, indices, weights) da matriz CSR do grafo com índices
+    int64, mais um indicador de pesos negativos.
+    
+    O scipy guarda os índices em int32; no kernel compilado isso custa uma
+    conversão a cada acesso (cerca de 3x mais lento em uma grade 200x200).
+    """
+    cached = _kernel_arrays_cache.get(graph)
+    if cached is not None and cached[0] is csr:
+        return cached[1]
+    
+    arrays = (csr.indptr.astype(np.int64), csr.indices.astype(np.int64),
+              csr.data.astype(np.float64), bool(csr.nnz and csr.data.min() < 0))
+    _kernel_arrays_cache[graph] = (csr, arrays)
+    return arrays
+
+def _dial_arrays(graph: nx.DiGraph, csr: csr_matrix):
+    """Pesos da matriz CSR do grafo convertidos por dial_weights (None se inviável)."""
+    cached = _dial_cache.get(graph)
+    if cached is not None and cached[0] is csr:
+        return cached[1]
+    
+    dial = dial_weights(csr.data.astype(np.float64))
+    _dial_cache[graph] = (csr, dial)
+    return dial
+
+def reconstruct_path_array(predecessors: np.ndarray,
+                           nodes: List[int],
+                           start: int,
+                           end: int) -> List[int]:
+    """
+    Reconstrói o caminho a partir de um array de predecessores por índice
+    (como o devolvido pelo scipy.sparse.csgraph, com valores negativos para
+    "sem predecessor").
+    
+    Args:
+        predecessors: Array de predecessores indexado pela posição do nó
+        nodes: Lista de nós (posição -> nó)
+        start: Índice do nó de origem
+        end: Índice do nó de destino
+        
+    Returns:
+        Lista de nós representando o caminho ou [] se não houver caminho
+    """
+    indices = path_indices(np.asarray(predecessors), start, end)
+    return [nodes[i] for i in indices.tolist()]
 
 def reconstruct_path(predecessors: Dict[int, Optional[int]], 
                     start: int, 
@@ -124,7 +445,8 @@ def reconstruct_path(predecessors: Dict[int, Optional[int]],
 
 def get_shortest_distance(graph: nx.DiGraph, 
                          start: int, 
-                         end: int) -> float:
+                         end: int,
+                         csr: Optional[Tuple[csr_matrix, List[int], Dict[int, int]]] = None) -> float:
     """
     Retorna apenas a distância mínima entre dois nós.
     Mais eficiente quando não se precisa do caminho completo.
@@ -137,18 +459,31 @@ def get_shortest_distance(graph: nx.DiGraph,
     Returns:
         Distância mínima ou float('inf') se não houver caminho
     """
-    path, distance = find_path_dijkstra(graph, start, end)
-    return distance
+    if start == end:
+        return 0.0
+    
+    if not graph.has_node(start) or not graph.has_node(end):
+        return float('inf')
+    
+    csr = csr if csr is not None else get_csr(graph)
+    node_index = csr[2]
+    return get_shortest_distance_by_index(graph, node_index[start], node_index[end], csr)
 
 def get_all_shortest_distances(graph: nx.DiGraph, 
-                              start: int) -> Dict[int, float]:
+                              start: int,
+                              csr: Optional[Tuple[csr_matrix, List[int], Dict[int, int]]] = None) -> Dict[int, float]:
     """
     Calcula distâncias mínimas de um nó para todos os outros.
     Útil para construção de matrizes de custo.
     
+    Usa a busca sobre a CSR (mesmas regras de peso de
+    graph_to_csr, inclusive para MultiDiGraph); grafos com pesos negativos
+    usam a busca em Python.
+    
     Args:
         graph: Grafo dirigido e ponderado
         start: Nó de origem
+        csr: (opcional) Tupla de get_csr guardada pelo chamador; ver get_csr
         
     Returns:
         Dicionário {nó: distância_mínima}
@@ -156,37 +491,12 @@ def get_all_shortest_distances(graph: nx.DiGraph,
     if not graph.has_node(start):
         return {}
     
-    distances = {node: float('inf') for node in graph.nodes()}
-    visited = set()
-    
-    distances[start] = 0.0
-    priority_queue = filaPrioridade()
-    priority_queue.put(start, 0.0)
+    matrix, nodes, node_index = csr if csr is not None else get_csr(graph)
+    result = _csr_search(graph, matrix, node_index[start], -1)
+    if result is None:
+        return single_source_dijkstra(graph, start)[0]
     
-    while not priority_queue.is_empty():
-        current = priority_queue.get()
-        
-        if current in visited:
-            continue
-            
-        visited.add(current)
-        
-        for neighbor in graph.neighbors(current):
-            if neighbor in visited:
-                continue
-                
-            edge_data = graph.get_edge_data(current, neighbor)
-            if not edge_data:
-                continue
-                
-            edge_weight = edge_data.get('length', edge_data.get('weight', 1.0))
-            new_distance = distances[current] + edge_weight
-            
-            if new_distance < distances[neighbor]:
-                distances[neighbor] = new_distance
-                priority_queue.put(neighbor, new_distance)
-    
-    return distances
+    return dict(zip(nodes, result[0].tolist()))
 
 def validate_graph_for_dijkstra(graph: nx.DiGraph) -> bool:
     """
@@ -0,0 +1,85 @@
+"""
+Dijkstra compilado com Numba sobre o grafo em arrays CSR.
+Usado por find_path_dijkstra para consultas origem-destino: ao contrário do
+csgraph, o kernel encerra a busca assim que o destino é fechado.
+"""
+
+import numpy as np
+from numba_compat import njit
+from datastructures import heap_push, heap_pop
+
+@njit(cache=True, fastmath=True)
+def dijkstra_csr(indptr, indices, weights, source, target):
+    """
+    Kernel de Dijkstra com heap binário em arrays e remoção preguiçosa.
+    
+    Args:
+        indptr, indices, weights: Arrays da matriz CSR do grafo
+        source: Índice do nó de origem
+        target: Índice do nó de destino (-1 calcula todos os nós)
+        
+    Returns:
+        Tupla (distâncias, predecessores) indexados pela posição do nó;
+        predecessor -1 indica nó sem predecessor
+    """
+    n = indptr.shape[0] - 1
+    distances = np.full(n, np.inf)
+    predecessors = np.full(n, -1, dtype=np.int64)
+    visited = np.zeros(n, dtype=np.bool_)
+    
+    # Cada aresta é relaxada no máximo uma vez (ao fechar sua origem)
+    capacity = indices.shape[0] + 1
+    keys = np.empty(capacity, dtype=np.float64)
+    order = np.empty(capacity, dtype=np.int64)
+    items = np.empty(capacity, dtype=np.int64)
+    
+    distances[source] = 0.0
+    size = heap_push(keys, order, items, 0, 0.0, 0, source)
+    seq = 1
+    
+    while size > 0:
+        _, current, size = heap_pop(keys, order, items, size)
+        
+        if visited[current]:
+            continue
+        
+        visited[current] = True
+        
+        if current == target:
+            break
+        
+        for k in range(indptr[current], indptr[current + 1]):
+            neighbor = indices[k]
+            if visited[neighbor]:
+                continue
+            
+            new_distance = distances[current] + weights[k]
+            if new_distance < distances[neighbor]:
+                distances[neighbor] = new_distance
+                predecessors[neighbor] = current
+                size = heap_push(keys, order, items, size, new_distance, seq, neighbor)
+                seq += 1
+    
+    return distances, predecessors
+
+@njit(cache=True)
+def path_indices(predecessors, start, end):
+    """
+    Caminho (em índices) do início ao fim a partir do array de predecessores.
+    
+    Os índices são gravados em um buffer pré-alocado de tamanho V, do fim
+    para o início, e devolvidos em ordem; array vazio se não houver caminho
+    (predecessor negativo ou ciclo nos predecessores).
+    """
+    n = predecessors.shape[0]
+    out = np.empty(n, dtype=np.int64)
+    count = 0
+    current = end
+    while current != start:
+        if current < 0 or count >= n - 1:
+            return out[:0]
+        out[count] = current
+        count += 1
+        current = predecessors[current]
+    out[count] = start
+    return out[count::-1].copy()
@@ -8,7 +8,7 @@ from typing import Tuple
 # --- Imports do Backend ---
 try:
     from graph_parser import GraphParser
-    from a_star import find_path_a_star, get_shortest_distance_a_star
+    from a_star import find_path_a_star, find_nearest_target_a_star
     from dijkstra import find_path_dijkstra
     import osmnx as ox
     import networkx as nx
@@ -330,16 +330,11 @@ class RouteOptimizerGUI:
             while unvisited_points:
                 current_node = self.point_nodes[current_point]
 
-                nearest_point = None
-                min_dist = float('inf')
-
-                for point in unvisited_points:
-                    target_node = self.point_nodes[point]
-                    dist = get_shortest_distance_a_star(self.graph, current_node, target_node)
-
-                    if dist < min_dist:
-                        min_dist = dist
-                        nearest_point = point
+                # Cota em linha reta descarta a maioria dos candidatos sem rodar o A*
+                nearest_index, min_dist = find_nearest_target_a_star(
+                    self.graph, current_node, [self.point_nodes[point] for point in unvisited_points]
+                )
+                nearest_point = unvisited_points[nearest_index] if nearest_index is not None else None
 
                 if nearest_point is None or min_dist == float('inf'):
                     messagebox.showwarning("Aviso",
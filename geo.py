@@ -0,0 +1,120 @@
+"""
+Coordenadas geográficas dos nós e kernels de distância compartilhados pelo
+A* em Python (a_star) e pelo A* compilado (a_star_numba).
+"""
+
+from typing import Dict, Tuple
+from weakref import WeakKeyDictionary
+import networkx as nx
+import numpy as np
+from numba_compat import njit
+from math import sin, cos, asin, sqrt, radians
+import math
+
+# Raio médio da Terra (IUGG) em quilômetros
+_R = 6371.0088
+
+# Tabela de coordenadas (SoA) por grafo, criada por _precompute_coords.
+# As chaves são fracas: a entrada some junto com o grafo.
+_coord_cache = WeakKeyDictionary()
+
+@njit('f8(f8, f8, f8, f8)', cache=True, fastmath=True)
+def _haversine_kernel(lat1, lon1, lat2, lon2):
+    """Kernel escalar de Haversine (compilado pelo Numba quando disponível)."""
+    lat1_rad = radians(lat1)
+    lon1_rad = radians(lon1)
+    lat2_rad = radians(lat2)
+    lon2_rad = radians(lon2)
+    
+    dlat = lat2_rad - lat1_rad
+    dlon = lon2_rad - lon1_rad
+    
+    a = (sin(dlat / 2) ** 2 + 
+         cos(lat1_rad) * cos(lat2_rad) * sin(dlon / 2) ** 2)
+    # min() protege asin de arredondamentos acima de 1.0 (fastmath, antípodas)
+    c = 2 * asin(min(1.0, sqrt(a)))
+
+    return (_R * c) * 1000.0
+
+# Aproximação equiretangular: 1 grau de arco = _R * pi / 180 km. Até
+# _CHEAP_HEURISTIC_MAX_DEG graus de separação ela superestima o Haversine
+# em menos de 4e-5 (medido até latitudes de 89.5); o fator 1e-4 a mantém
+# abaixo dele e, portanto, admissível.
+_CHEAP_HEURISTIC_MAX_DEG = 1.0
+_CHEAP_METERS_PER_DEG = _R * 1000.0 * math.pi / 180.0 * (1.0 - 1e-4)
+
+@njit('f8(f8, f8, f8, f8)', cache=True, fastmath=True)
+def _cheap_heuristic(lat1, lon1, lat2, lon2):
+    """
+    Limite inferior barato do Haversine (sem asin e com um único cos).
+    
+    Separações maiores que _CHEAP_HEURISTIC_MAX_DEG (inclusive as que cruzam
+    o antimeridiano) usam o Haversine completo.
+    """
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    if abs(dlat) + abs(dlon) > _CHEAP_HEURISTIC_MAX_DEG:
+        return _haversine_kernel(lat1, lon1, lat2, lon2)
+    
+    dlon = dlon * cos(radians((lat1 + lat2) * 0.5))
+    return _CHEAP_METERS_PER_DEG * sqrt(dlat * dlat + dlon * dlon)
+
+def get_node_coordinates(graph: nx.DiGraph, node: int) -> Tuple[float, float]:
+    """
+    Extrai coordenadas geográficas de um nó do grafo.
+    
+    Args:
+        graph: Grafo com atributos de coordenadas
+        node: ID do nó
+        
+    Returns:
+        Tuple (latitude, longitude)
+    """
+    node_data = graph.nodes[node]
+    
+    if 'y' in node_data and 'x' in node_data:
+        return node_data['y'], node_data['x'] 
+    elif 'lat' in node_data and 'lon' in node_data:
+        return node_data['lat'], node_data['lon']
+    elif 'latitude' in node_data and 'longitude' in node_data:
+        return node_data['latitude'], node_data['longitude']
+    else:
+        return (0.0, 0.0)  
+
+def _precompute_coords(graph: nx.DiGraph) -> Tuple[np.ndarray, np.ndarray, Dict[int, int]]:
+    """
+    Monta (uma vez por grafo) as coordenadas em arrays contíguos de latitude e
+    longitude, indexados pela posição do nó.
+    
+    Aceita os mesmos formatos de get_node_coordinates; coordenadas não
+    numéricas viram NaN. A tabela é refeita quando o número de nós muda;
+    alterações nos atributos de coordenadas de nós existentes não são
+    detectadas.
+    
+    Args:
+        graph: Grafo com coordenadas geográficas
+        
+    Returns:
+        Tupla (latitudes, longitudes, mapeamento nó -> índice)
+    """
+    cached = _coord_cache.get(graph)
+    if cached is not None and len(cached[2]) == graph.number_of_nodes():
+        return cached
+    
+    n = graph.number_of_nodes()
+    lats = np.empty(n, dtype=np.float64)
+    lons = np.empty(n, dtype=np.float64)
+    node_index = {}
+    
+    for i, node in enumerate(graph.nodes()):
+        node_index[node] = i
+        lat, lon = get_node_coordinates(graph, node)
+        try:
+            lats[i] = float(lat)
+            lons[i] = float(lon)
+        except (TypeError, ValueError):
+            lats[i] = lons[i] = np.nan
+    
+    cached = (lats, lons, node_index)
+    _coord_cache[graph] = cached
+    return cached
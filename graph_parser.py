@@ -1,5 +1,8 @@
 import osmnx as ox
 import networkx as nx
+import numpy as np
+from dijkstra import graph_signature
+from scipy.spatial import cKDTree
 from typing import Dict, List, Tuple, Any
 
 
@@ -13,6 +16,11 @@ class GraphParser:
         # Inicializa o parser com uma localização geográfica.
         self.location_query = location_query
         self.graph = None
+        # Representação em arrays (ver to_soa), criada sob demanda
+        self._soa = None
+        self._node_relabel = None
+        # Árvore de busca do nó mais próximo (ver get_closest_nodes_batch)
+        self._kdtree = None
         print(f"Parser do Grafo inicializado para '{location_query}'")
 
     def build_graph(self) -> nx.MultiDiGraph:
@@ -27,6 +35,9 @@ class GraphParser:
         # Isso garante que o grafo é totalmente navegável de qualquer ponto a outro.
         largest_component = max(nx.weakly_connected_components(initial_graph), key=len)
         self.graph = initial_graph.subgraph(largest_component).copy()
+        self._soa = None
+        self._node_relabel = None
+        self._kdtree = None
         print(f"Grafo refinado para {self.graph.number_of_nodes()} nós e {self.graph.number_of_edges()} arestas.")
 
         # OSMnx estima a velocidade com base no tipo de via (highway tag).
@@ -47,30 +58,129 @@ class GraphParser:
             raise ValueError("Grafo não construído. Chame o método build_graph() primeiro.")
         return self.graph
 
-    # --- INÍCIO DA CORREÇÃO ---
+    def to_soa(self) -> Dict[str, np.ndarray]:
+        """
+        Converte o grafo (uma vez) em arrays contíguos, um por atributo.
+        
+        Os nós são renumerados para [0, n) na ordem do grafo; 'node_ids'
+        guarda o ID OSM de cada posição e 'node_xy' as coordenadas (x=lon,
+        y=lat). Cada aresta vira uma entrada de 'edge_src', 'edge_dst' e
+        'edge_len', com o mesmo peso usado pelos algoritmos ('length', ou
+        'weight' na falta dele); arestas paralelas são mantidas. A conversão
+        é refeita quando nós, arestas ou pesos mudam (mesma assinatura de
+        dijkstra.get_csr).
+        
+        Returns:
+            Dicionário com 'node_ids', 'node_xy', 'edge_src', 'edge_dst' e
+            'edge_len'
+        """
+        graph = self.get_graph()
+        signature = graph_signature(graph)
+        if self._soa is not None and self._soa[0] == signature:
+            return self._soa[1]
+
+        n = graph.number_of_nodes()
+        node_ids = np.fromiter(graph.nodes(), dtype=np.int64, count=n)
+        node_xy = np.array([(data.get('x', np.nan), data.get('y', np.nan))
+                            for _, data in graph.nodes(data=True)], dtype=np.float64).reshape(n, 2)
+
+        # IDs ordenados + permutação: busca ID -> posição com searchsorted
+        order = np.argsort(node_ids, kind='stable')
+        self._node_relabel = (node_ids[order], order)
+
+        default_weight = float('inf') if graph.is_multigraph() else 1.0
+        src, dst, length = [], [], []
+        for u, v, data in graph.edges(data=True):
+            weight = data.get('length', data.get('weight', default_weight))
+            if weight == float('inf'):
+                continue
+            src.append(u)
+            dst.append(v)
+            length.append(weight)
+            if not graph.is_directed():
+                src.append(v)
+                dst.append(u)
+                length.append(weight)
+
+        soa = {
+            'node_ids': node_ids,
+            'node_xy': node_xy,
+            'edge_src': self._positions(src).astype(np.int32),
+            'edge_dst': self._positions(dst).astype(np.int32),
+            'edge_len': np.asarray(length, dtype=np.float64),
+        }
+        self._soa = (signature, soa)
+        return soa
+
+    def node_positions(self, node_ids) -> np.ndarray:
+        """
+        Converte IDs OSM nas posições [0, n) usadas por to_soa.
+        
+        Args:
+            node_ids: Sequência de IDs de nós do grafo
+            
+        Returns:
+            Array int64 com a posição de cada nó
+        """
+        self.to_soa()
+        return self._positions(node_ids)
+
+    def _positions(self, node_ids) -> np.ndarray:
+        """node_positions sobre a renumeração atual, sem reconferir o grafo."""
+        sorted_ids, order = self._node_relabel
+
+        node_ids = np.asarray(node_ids, dtype=np.int64)
+        if node_ids.size == 0:
+            return np.empty(0, dtype=np.int64)
+
+        found = np.searchsorted(sorted_ids, node_ids)
+        found = np.minimum(found, len(sorted_ids) - 1)
+        if len(sorted_ids) == 0 or np.any(sorted_ids[found] != node_ids):
+            raise ValueError("Nó não encontrado no grafo.")
+        return order[found]
+
     def get_closest_node(self, lat: float, lon: float) -> int:
         # Encontra o nó do grafo mais próximo de um par de coordenadas geográficas.
-        if self.graph is None:
-            raise ValueError("Grafo não construído.")
-
-        # 1. Usa 'nearest_nodes' (plural), que é a função correta da API.
-        node_or_array = ox.distance.nearest_nodes(self.graph, X=lon, Y=lat)
-
-        # 2. Verifica se o resultado já é um 'int' (comportamento de versões novas)
-        if isinstance(node_or_array, int):
-            # Isso corrige o erro "'int' object is not subscriptable"
-            return node_or_array
-
-        # 3. Se não for 'int', trata como array (comportamento de versões antigas)
-        try:
-            # Extrai o primeiro elemento como 'int'.
-            # Isso corrige o erro "The truth value of an array..."
-            return int(node_or_array[0])
-        except (TypeError, IndexError):
-            # Se falhar, algo está muito errado.
-            raise ValueError(f"Não foi possível extrair o ID do nó do resultado: {node_or_array}")
-
-    # --- FIM DA CORREÇÃO ---
+        return int(self.get_closest_nodes_batch([lon], [lat])[0])
+
+    def get_closest_nodes_batch(self, xs, ys) -> np.ndarray:
+        """
+        Encontra, em uma única consulta, o nó mais próximo de cada ponto.
+        
+        Usa uma cKDTree montada uma vez sobre as coordenadas dos nós, com a
+        longitude escalada pelo cosseno da latitude média (aproximação
+        equirretangular, adequada à extensão de uma cidade).
+        
+        Args:
+            xs: Longitudes dos pontos
+            ys: Latitudes dos pontos
+            
+        Returns:
+            Array int64 com o ID do nó mais próximo de cada ponto
+        """
+        tree, scale, node_ids = self._closest_node_tree()
+        points = np.column_stack([np.asarray(xs, dtype=np.float64) * scale,
+                                  np.asarray(ys, dtype=np.float64)])
+        _, idx = tree.query(points)
+        return node_ids[idx]
+
+    def _closest_node_tree(self) -> Tuple[cKDTree, float, np.ndarray]:
+        """Monta (ou reaproveita) a cKDTree dos nós com coordenadas válidas."""
+        soa = self.to_soa()
+        if self._kdtree is not None and self._kdtree[0] is soa:
+            return self._kdtree[1]
+
+        node_xy = soa['node_xy']
+        valid = np.isfinite(node_xy).all(axis=1)
+        if not valid.any():
+            raise ValueError("Grafo sem nós com coordenadas válidas.")
+
+        coords = node_xy[valid]
+        scale = float(np.cos(np.radians(coords[:, 1].mean())))
+        tree = cKDTree(np.column_stack([coords[:, 0] * scale, coords[:, 1]]))
+
+        self._kdtree = (soa, (tree, scale, soa['node_ids'][valid]))
+        return self._kdtree[1]
 
     def get_node_attributes(self, node_id: int) -> Dict[str, Any]:
         # Retorna um dicionário com todos os atributos de um nó específico.
@@ -0,0 +1,32 @@
+"""
+Suporte opcional ao Numba.
+Quando o Numba não está instalado os decoradores viram no-ops e as funções
+"compiladas" rodam como Python puro, mantendo o mesmo comportamento.
+
+Os kernels usam cache=True: o código compilado fica em __pycache__ e é
+reaproveitado entre execuções. Se esse diretório não puder ser escrito,
+aponte a variável de ambiente NUMBA_CACHE_DIR para um diretório gravável.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit, vectorize, prange, get_num_threads
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def get_num_threads():
+        """Substituto de numba.get_num_threads: sem Numba há uma única thread."""
+        return 1
+
+    def njit(*args, **kwargs):
+        """Substituto de numba.njit: devolve a função sem compilar."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+    def vectorize(*args, **kwargs):
+        """Substituto de numba.vectorize baseado em np.vectorize."""
+        return lambda func: np.vectorize(func, otypes=[np.float64])
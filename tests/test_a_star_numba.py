@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Testes unitários para o A* compilado sobre arrays CSR.
+"""
+
+import unittest
+import sys
+import os
+import networkx as nx
+import numpy as np
+
+# Adiciona o diretório pai ao path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from a_star import haversine_distance
+from a_star_numba import find_path_a_star_numba, graph_arrays
+from datastructures import heap_push, heap_pop
+from dijkstra import find_path_dijkstra
+
+
+class TestArrayHeap(unittest.TestCase):
+    """Testa o heap sobre arrays usado pelos kernels."""
+
+    def test_heap_order_and_fifo_ties(self):
+        """Testa que o heap retorna em ordem de chave e FIFO nos empates."""
+        keys = np.empty(8)
+        order = np.empty(8, dtype=np.int64)
+        items = np.empty(8, dtype=np.int64)
+        entries = [(5.0, 0), (1.0, 1), (3.0, 2), (1.0, 3), (0.5, 4), (3.0, 5)]
+
+        size = 0
+        for seq, (key, item) in enumerate(entries):
+            size = heap_push(keys, order, items, size, key, seq, item)
+
+        popped = []
+        while size > 0:
+            key, item, size = heap_pop(keys, order, items, size)
+            popped.append(item)
+
+        self.assertEqual(popped, [4, 1, 3, 2, 5, 0])
+
+
+class TestAStarNumba(unittest.TestCase):
+    """Testa o A* compilado contra o Dijkstra."""
+
+    def setUp(self):
+        """Cria uma grade 6x6 com arestas paralelas e um nó isolado."""
+        self.graph = nx.MultiDiGraph()
+        size = 6
+        for i in range(size):
+            for j in range(size):
+                self.graph.add_node(i * size + j, y=-23.55 + i * 0.001, x=-46.63 + j * 0.001)
+        for i in range(size):
+            for j in range(size - 1):
+                for u, v in [(i * size + j, i * size + j + 1), (j * size + i, (j + 1) * size + i)]:
+                    length = 1.1 * haversine_distance(self.graph.nodes[u]['y'], self.graph.nodes[u]['x'],
+                                                      self.graph.nodes[v]['y'], self.graph.nodes[v]['x'])
+                    self.graph.add_edge(u, v, length=length)
+                    self.graph.add_edge(v, u, length=length * 2)
+                    self.graph.add_edge(v, u, length=length)
+        self.graph.add_node(99, y=-23.0, x=-46.0)
+
+    def test_matches_dijkstra(self):
+        """Testa distâncias e caminhos válidos para vários pares."""
+        for start, end in [(0, 35), (35, 0), (5, 30), (14, 14), (7, 22)]:
+            _, expected = find_path_dijkstra(self.graph, start, end)
+            path, distance = find_path_a_star_numba(self.graph, start, end)
+
+            self.assertAlmostEqual(distance, expected, places=6)
+            self.assertEqual(path[0], start)
+            self.assertEqual(path[-1], end)
+            for u, v in zip(path, path[1:]):
+                self.assertTrue(self.graph.has_edge(u, v))
+
+    def test_no_path_and_missing_nodes(self):
+        """Testa destino inalcançável e nós inexistentes."""
+        self.assertEqual(find_path_a_star_numba(self.graph, 0, 99), ([], float('inf')))
+        self.assertEqual(find_path_a_star_numba(self.graph, 0, 1000), ([], float('inf')))
+
+    def test_graph_arrays_refresh(self):
+        """Testa que os arrays são reaproveitados e refeitos quando o grafo muda."""
+        first = graph_arrays(self.graph)
+        self.assertIs(graph_arrays(self.graph), first)
+
+        self.graph.add_edge(35, 99, length=1.0)
+        refreshed = graph_arrays(self.graph)
+        self.assertIsNot(refreshed, first)
+        self.assertEqual(find_path_a_star_numba(self.graph, 35, 99), ([35, 99], 1.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,19 +5,28 @@ Testes unitários para o módulo A*.
 import unittest
 import sys
 import os
+import importlib
 import networkx as nx
+import numpy as np
+from unittest.mock import patch
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from a_star import (
     haversine_distance,
+    haversine_distance_vector,
     get_node_coordinates,
     calculate_heuristic,
     find_path_a_star,
     get_shortest_distance_a_star,
     validate_graph_for_a_star,
-    compare_algorithms_performance
+    compare_algorithms_performance,
+    find_path_a_star_bidirectional,
+    find_nearest_target_a_star,
+    _heuristic_function,
+    _cheap_heuristic
 )
+from dijkstra import find_path_dijkstra
 
 
 class TestHaversineDistance(unittest.TestCase):
@@ -43,6 +52,29 @@ class TestHaversineDistance(unittest.TestCase):
         self.assertGreater(distance, 10.0)  # É ~15.7 metros
         self.assertLess(distance, 20.0)  # É ~15.7 metros
 
+    def test_cheap_heuristic_is_lower_bound(self):
+        """Testa que a aproximação equiretangular nunca excede o Haversine."""
+        rng = np.random.default_rng(0)
+        lat1 = rng.uniform(-89.0, 89.0, 500)
+        lon1 = rng.uniform(-180.0, 180.0, 500)
+        lat2 = lat1 + rng.uniform(-0.5, 0.5, 500)
+        lon2 = lon1 + rng.uniform(-0.5, 0.5, 500)
+
+        for points in zip(lat1, lon1, lat2, lon2):
+            exact = haversine_distance(*points)
+            cheap = _cheap_heuristic(*points)
+            self.assertLessEqual(cheap, exact)
+            self.assertGreaterEqual(cheap, exact * (1 - 2e-4))
+
+        # Separações grandes usam o Haversine completo
+        self.assertEqual(_cheap_heuristic(-23.5505, -46.6333, -22.9068, -43.1729),
+                         haversine_distance(-23.5505, -46.6333, -22.9068, -43.1729))
+
+    def test_haversine_distance_returns_python_float(self):
+        """Testa que o resultado escalar é float do Python, não escalar NumPy."""
+        distance = haversine_distance(np.float64(0.0), 0.0, 0.0001, 0.0001)
+        self.assertIs(type(distance), float)
+
     def test_haversine_distance_antipodes(self):
         """Testa distância entre pontos antípodas (EM METROS)."""
         distance = haversine_distance(0.0, 0.0, 0.0, 180.0)
@@ -50,6 +82,48 @@ class TestHaversineDistance(unittest.TestCase):
         # Novo (METROS):
         self.assertAlmostEqual(distance, 20015086.8, delta=100000.0)  # Delta de 100km
 
+    def test_haversine_distance_vector_matches_scalar(self):
+        """Testa que a versão vetorizada coincide com a escalar."""
+        lats = np.array([0.0, -23.5505, 0.0])
+        lons = np.array([0.0, -46.6333, 0.0])
+        distances = haversine_distance_vector(lats, lons, -22.9068, -43.1729)
+        
+        self.assertEqual(distances.shape, (3,))
+        for lat, lon, distance in zip(lats, lons, distances):
+            self.assertAlmostEqual(distance, haversine_distance(lat, lon, -22.9068, -43.1729), places=6)
+
+    def test_haversine_distance_vector_broadcast(self):
+        """Testa o cálculo de todos os pares via broadcasting."""
+        lats = np.array([0.0, 0.0001, 0.0])
+        lons = np.array([0.0, 0.0001, 180.0])
+        matrix = haversine_distance_vector(lats[:, None], lons[:, None], lats[None, :], lons[None, :])
+        
+        self.assertEqual(matrix.shape, (3, 3))
+        np.testing.assert_array_equal(np.diag(matrix), 0.0)
+        np.testing.assert_allclose(matrix, matrix.T)
+
+class TestHaversineWithoutNumba(unittest.TestCase):
+    """Testa o fallback em Python puro quando o Numba não está instalado."""
+
+    def test_fallback_matches_compiled(self):
+        """Testa que as versões sem Numba produzem os mesmos resultados."""
+        lats = np.array([0.0, -23.5505, 0.0])
+        lons = np.array([0.0, -46.6333, 180.0])
+
+        # patch.dict restaura sys.modules (e os módulos originais) ao sair
+        with patch.dict(sys.modules, {'numba': None}):
+            sys.modules.pop('numba_compat', None)
+            sys.modules.pop('geo', None)
+            sys.modules.pop('a_star', None)
+            fallback = importlib.import_module('a_star')
+
+            self.assertFalse(fallback.NUMBA_AVAILABLE)
+            for lat, lon in zip(lats, lons):
+                self.assertAlmostEqual(fallback.haversine_distance(lat, lon, -22.9068, -43.1729),
+                                       haversine_distance(lat, lon, -22.9068, -43.1729), places=3)
+            np.testing.assert_allclose(fallback.haversine_distance_vector(lats, lons, -22.9068, -43.1729),
+                                       haversine_distance_vector(lats, lons, -22.9068, -43.1729))
+
 class TestNodeCoordinates(unittest.TestCase):
     """Testa extração de coordenadas de nós."""
     
@@ -84,6 +158,20 @@ class TestNodeCoordinates(unittest.TestCase):
         lat, lon = get_node_coordinates(self.graph, 3)
         self.assertEqual(lat, 0.0)
         self.assertEqual(lon, 0.0)
+    
+    def test_calculate_heuristic_coordinate_table(self):
+        """Testa a heurística com a tabela de coordenadas nos vários formatos."""
+        expected = haversine_distance(-23.5505, -46.6333, -22.9068, -43.1729)
+        self.assertAlmostEqual(calculate_heuristic(self.graph, 0, 1), expected, places=6)
+        self.assertEqual(calculate_heuristic(self.graph, 2, 3), 0.0)
+        
+        # Nó adicionado depois da primeira chamada: a tabela é refeita
+        self.graph.add_node(4, y=-23.5505, x=-46.6333)
+        self.assertAlmostEqual(calculate_heuristic(self.graph, 4, 1), expected, places=6)
+        
+        # Coordenadas não numéricas: heurística nula
+        self.graph.add_node(5, y='sul', x='oeste')
+        self.assertEqual(calculate_heuristic(self.graph, 5, 1), 0.0)
 
 class TestAStarAlgorithm(unittest.TestCase):
     """Testa o algoritmo A*."""
@@ -131,6 +219,20 @@ class TestAStarAlgorithm(unittest.TestCase):
         self.assertEqual(path[0], 0)
         self.assertEqual(path[-1], 4)
     
+    def test_heuristic_cache_reused(self):
+        """Testa que buscas repetidas reaproveitam a heurística memoizada."""
+        # A busca bidirecional sempre usa a heurística memoizada (a versão
+        # unidirecional pode rodar no kernel compilado)
+        first = find_path_a_star_bidirectional(self.graph, 0, 4)
+        misses = _heuristic_function(self.graph).cache_info().misses
+        
+        second = find_path_a_star_bidirectional(self.graph, 0, 4)
+        info = _heuristic_function(self.graph).cache_info()
+        
+        self.assertEqual(first, second)
+        self.assertEqual(info.misses, misses)
+        self.assertGreater(info.hits, 0)
+    
     def test_find_path_a_star_no_path(self):
         """Testa quando não há caminho."""
         self.graph.add_node(5, y=0.0, x=0.0)
@@ -138,6 +240,18 @@ class TestAStarAlgorithm(unittest.TestCase):
         self.assertEqual(path, [])
         self.assertEqual(distance, float('inf'))
     
+    def test_find_path_a_star_bounded_open_list(self):
+        """Testa que um limite folgado na lista aberta mantém o resultado."""
+        expected = find_path_a_star(self.graph, 0, 4)
+        self.assertEqual(find_path_a_star(self.graph, 0, 4, max_open=16), expected)
+        self.assertEqual(find_path_a_star(self.graph, 0, 4, max_open='auto'), expected)
+    
+    def test_find_path_a_star_invalid_max_open(self):
+        """Testa rejeição de valores inválidos para max_open."""
+        for invalid in [0, -1, 'xyz', 1.5, True]:
+            with self.assertRaises(ValueError):
+                find_path_a_star(self.graph, 0, 4, max_open=invalid)
+    
     def test_calculate_heuristic(self):
         """Testa cálculo de heurística."""
         heuristic = calculate_heuristic(self.graph, 0, 4)
@@ -171,6 +285,18 @@ class TestAStarAlgorithm(unittest.TestCase):
         invalid_graph.add_edge(0, 1, length=-1.0)
         self.assertFalse(validate_graph_for_a_star(invalid_graph))
     
+    def test_validate_graph_for_a_star_multigraph_and_empty(self):
+        """Testa validação de MultiDiGraph com arestas paralelas e de grafo vazio."""
+        self.assertTrue(validate_graph_for_a_star(nx.DiGraph()))
+        
+        multigraph = nx.MultiDiGraph()
+        multigraph.add_edge(0, 1, length=3.0)
+        multigraph.add_edge(0, 1, length=2.0)
+        self.assertTrue(validate_graph_for_a_star(multigraph))
+        
+        multigraph.add_edge(0, 1, weight=-2.0)
+        self.assertFalse(validate_graph_for_a_star(multigraph))
+    
     def test_edge_weight_fallback(self):
         """Testa fallback para atributo 'weight' quando 'length' não existe."""
         graph_no_length = nx.DiGraph()
@@ -184,6 +310,41 @@ class TestAStarAlgorithm(unittest.TestCase):
         self.assertEqual(path, [0, 1])
         self.assertEqual(distance, 5.0)
 
+class TestFindNearestTarget(unittest.TestCase):
+    """Testa a escolha do alvo mais próximo com corte pela cota em linha reta."""
+
+    def setUp(self):
+        """Nós no equador a cada 0,01° de longitude (~1112 m), arestas de 1200 m."""
+        self.graph = nx.DiGraph()
+        for node in range(5):
+            self.graph.add_node(node, y=0.0, x=node / 100.0)
+        for u in range(4):
+            self.graph.add_edge(u, u + 1, length=1200.0)
+            self.graph.add_edge(u + 1, u, length=1200.0)
+        self.graph.add_node(9, y=0.0, x=0.005)
+
+    def test_nearest_target(self):
+        """Testa o alvo escolhido e a distância devolvida."""
+        self.assertEqual(find_nearest_target_a_star(self.graph, 0, [3, 1, 2]), (1, 1200.0))
+        self.assertEqual(find_nearest_target_a_star(self.graph, 2, [4, 0, 1, 3]), (2, 1200.0))
+        self.assertEqual(find_nearest_target_a_star(self.graph, 0, []), (None, float('inf')))
+        self.assertEqual(find_nearest_target_a_star(self.graph, 0, [9]), (None, float('inf')))
+
+    def test_nearest_target_stops_early(self):
+        """Testa que candidatos com cota maior que a melhor distância não são buscados."""
+        with patch('a_star.get_shortest_distance_a_star',
+                   wraps=get_shortest_distance_a_star) as search:
+            nearest = find_nearest_target_a_star(self.graph, 0, [4, 3, 2, 1])
+
+        self.assertEqual(nearest, (3, 1200.0))
+        self.assertEqual(search.call_count, 1)
+
+    def test_nearest_target_unreachable_closest(self):
+        """Testa que um alvo próximo sem caminho não impede achar o seguinte."""
+        nearest = find_nearest_target_a_star(self.graph, 0, [2, 9])
+        self.assertEqual(nearest, (0, 2400.0))
+
+
 class TestAStarPerformance(unittest.TestCase):
     """Testa performance do algoritmo A*."""
     
@@ -232,6 +393,61 @@ class TestAStarPerformance(unittest.TestCase):
         print(f"Performance comparison: Dijkstra={comparison['dijkstra_time']:.4f}s, "
               f"A*={comparison['astar_time']:.4f}s")
 
+    def test_bounded_open_list_trims(self):
+        """Testa max_open pequeno o bastante para descartar entradas."""
+        graph = nx.DiGraph()
+        size = 6
+        for i in range(size):
+            for j in range(size):
+                graph.add_node(i * size + j, y=i * 0.01, x=j * 0.01)
+        for i in range(size):
+            for j in range(size):
+                current = i * size + j
+                for di, dj in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
+                    if 0 <= i + di < size and 0 <= j + dj < size:
+                        graph.add_edge(current, (i + di) * size + (j + dj), length=1.0)
+        
+        end = size * size - 1
+        _, exact = find_path_a_star(graph, 0, end)
+        path, distance = find_path_a_star(graph, 0, end, max_open=1)
+        
+        if path:
+            self.assertEqual(path[0], 0)
+            self.assertEqual(path[-1], end)
+            for u, v in zip(path, path[1:]):
+                self.assertTrue(graph.has_edge(u, v))
+            self.assertEqual(distance, len(path) - 1)
+            self.assertGreaterEqual(distance, exact)
+        else:
+            self.assertEqual(distance, float('inf'))
+    
+    def test_find_path_a_star_bidirectional(self):
+        """Testa A* bidirecional contra Dijkstra em uma grade com comprimentos reais."""
+        graph = nx.MultiDiGraph()
+        size = 5
+        for i in range(size):
+            for j in range(size):
+                graph.add_node(i * size + j, y=-23.55 + i * 0.001, x=-46.63 + j * 0.001)
+        for i in range(size):
+            for j in range(size - 1):
+                for u, v in [(i * size + j, i * size + j + 1), (j * size + i, (j + 1) * size + i)]:
+                    length = 1.2 * haversine_distance(graph.nodes[u]['y'], graph.nodes[u]['x'],
+                                                      graph.nodes[v]['y'], graph.nodes[v]['x'])
+                    graph.add_edge(u, v, length=length)
+                    graph.add_edge(v, u, length=length)
+        
+        for start, end in [(0, 24), (24, 0), (3, 21), (12, 12)]:
+            expected_path, expected = find_path_dijkstra(graph, start, end)
+            path, distance = find_path_a_star_bidirectional(graph, start, end)
+            self.assertAlmostEqual(distance, expected, places=6)
+            self.assertEqual(path[0], start)
+            self.assertEqual(path[-1], end)
+            self.assertEqual(len(path), len(expected_path))
+        
+        graph.add_node(99, y=-23.0, x=-46.0)
+        self.assertEqual(find_path_a_star_bidirectional(graph, 0, 99), ([], float('inf')))
+        self.assertEqual(get_shortest_distance_a_star(graph, 99, 0), float('inf'))
+
 class TestAStarEdgeCases(unittest.TestCase):
     """Testa casos extremos do algoritmo A*."""
     
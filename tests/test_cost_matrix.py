@@ -8,6 +8,7 @@ import sys
 import os
 import networkx as nx
 import numpy as np
+from unittest.mock import patch
 
 # Adiciona o diretório pai ao path para importar módulos
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -20,6 +21,7 @@ from cost_matrix import (
     print_cost_matrix,
     export_cost_matrix
 )
+from dijkstra import find_path_dijkstra
 
 class TestCostMatrix(unittest.TestCase):
     """Testa as funções do módulo de matriz de custo."""
@@ -100,6 +102,33 @@ class TestCostMatrix(unittest.TestCase):
         if (0, 1) in result['paths']:
             self.assertEqual(result['paths'][(0, 1)], [0, 1])
     
+    def test_compute_cost_matrix_parallel_matches_serial(self):
+        """Testa que a versão paralela produz a mesma matriz que a sequencial."""
+        for i, node in enumerate(self.test_nodes):
+            self.graph.nodes[node]['y'] = i * 0.01
+            self.graph.nodes[node]['x'] = i * 0.01
+        
+        for algorithm in ['dijkstra', 'a_star']:
+            serial = compute_cost_matrix(self.graph, self.test_nodes, algorithm=algorithm,
+                                         use_paths=True, max_workers=1)
+            with patch('cost_matrix.PARALLEL_MIN_NODES', 2):
+                parallel = compute_cost_matrix(self.graph, self.test_nodes, algorithm=algorithm,
+                                               use_paths=True, max_workers=2)
+            
+            np.testing.assert_array_equal(parallel['matrix'], serial['matrix'])
+            self.assertEqual(parallel['paths'], serial['paths'])
+    
+    def test_compute_cost_matrix_float32(self):
+        """Testa matriz em float32 contra a versão float64."""
+        for algorithm in ['dijkstra', 'a_star']:
+            full = compute_cost_matrix(self.graph, self.test_nodes, algorithm=algorithm)
+            compact = compute_cost_matrix(self.graph, self.test_nodes, algorithm=algorithm,
+                                          dtype=np.float32)
+            
+            self.assertEqual(compact['matrix'].dtype, np.float32)
+            np.testing.assert_allclose(compact['matrix'], full['matrix'], rtol=1e-6)
+            self.assertTrue(validate_cost_matrix(compact['matrix'], compact['node_index']))
+    
     def test_compute_cost_matrix_invalid_algorithm(self):
         """Testa algoritmo inválido."""
         with self.assertRaises(ValueError):
@@ -117,6 +146,21 @@ class TestCostMatrix(unittest.TestCase):
         # Verifica diagonal
         np.testing.assert_array_equal(np.diag(matrix), 0.0)
     
+    def test_compute_cost_matrix_symmetric_values(self):
+        """Testa os valores da matriz simétrica em grafos dirigidos e não dirigidos."""
+        full = compute_cost_matrix(self.graph, self.test_nodes, algorithm='dijkstra')['matrix']
+        symmetric = compute_cost_matrix_symmetric(self.graph, self.test_nodes,
+                                                  algorithm='dijkstra')['matrix']
+        np.testing.assert_array_equal(symmetric, np.minimum(full, full.T))
+        
+        undirected = nx.Graph(self.graph)
+        for algorithm in ['a_star', 'dijkstra']:
+            matrix = compute_cost_matrix_symmetric(undirected, self.test_nodes,
+                                                   algorithm=algorithm)['matrix']
+            np.testing.assert_array_equal(matrix, matrix.T)
+            self.assertEqual(matrix[0, 4], 23.0)  # 0->1->3->4
+            self.assertEqual(matrix[4, 0], 23.0)
+    
     def test_get_cost_between_nodes(self):
         """Testa obtenção de custo entre dois nós."""
         result = compute_cost_matrix(self.graph, self.test_nodes, algorithm='dijkstra')
@@ -150,6 +194,8 @@ class TestCostMatrix(unittest.TestCase):
         node_index = {0: 0, 1: 1, 2: 2}
         
         self.assertFalse(validate_cost_matrix(invalid_matrix, node_index))
+        self.assertFalse(validate_cost_matrix(np.zeros(3), node_index))
+        self.assertFalse(validate_cost_matrix(np.zeros((3, 3, 3)), node_index))
     
     def test_validate_cost_matrix_invalid_diagonal(self):
         """Testa validação de matriz com diagonal não zero."""
@@ -220,6 +266,32 @@ class TestCostMatrixEdgeCases(unittest.TestCase):
         self.assertEqual(len(result['node_index']), 3)
         self.assertEqual(result['matrix'].shape, (3, 3))
 
+    def test_dijkstra_multigraph_matches_search(self):
+        """Testa a matriz via CSR contra a busca em Python em um MultiDiGraph."""
+        graph = nx.MultiDiGraph()
+        graph.add_nodes_from([0, 1, 2, 3])
+        graph.add_edge(0, 1, length=4.0)
+        graph.add_edge(0, 1, length=1.0)
+        graph.add_edge(1, 2, length=0.0)
+        graph.add_edge(2, 0, length=2.0)
+        nodes = [0, 1, 2, 3, 99]
+        
+        result = compute_cost_matrix(graph, nodes, algorithm='dijkstra', use_paths=True)
+        matrix = result['matrix']
+        
+        for source in nodes:
+            for target in nodes:
+                path, distance = find_path_dijkstra(graph, source, target)
+                i, j = result['node_index'][source], result['node_index'][target]
+                if source == target:
+                    self.assertEqual(matrix[i, j], 0.0)
+                    continue
+                self.assertEqual(matrix[i, j], distance)
+                if distance != float('inf'):
+                    self.assertEqual(result['paths'][(source, target)], path)
+        
+        self.assertEqual(result['paths'][(0, 2)], [0, 1, 2])
+
 class TestCostMatrixUtilities(unittest.TestCase):
     """Testa funções utilitárias da matriz de custo."""
     
@@ -279,6 +351,31 @@ class TestCostMatrixUtilities(unittest.TestCase):
             if os.path.exists(tmp_filename):
                 os.unlink(tmp_filename)
 
+    def test_export_cost_matrix_round_trip(self):
+        """Testa que os valores exportados são relidos sem perda em float32 e float64."""
+        import tempfile
+        import os
+        
+        matrix = np.array([[0.0, 1234567.0, np.inf], [0.1, 0.0, 1234.5678], [20.0, np.inf, 0.0]])
+        node_index = {0: 0, 1: 1, 2: 2}
+        
+        for dtype in [np.float64, np.float32]:
+            expected = matrix.astype(dtype)
+            with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as tmp_file:
+                tmp_filename = tmp_file.name
+            try:
+                export_cost_matrix(expected, node_index, tmp_filename)
+                with open(tmp_filename, 'r') as f:
+                    content = f.read()
+                    f.seek(0)
+                    loaded = np.genfromtxt(f, delimiter=',', skip_header=1, filling_values=np.inf)
+            finally:
+                if os.path.exists(tmp_filename):
+                    os.unlink(tmp_filename)
+            
+            self.assertNotIn('inf', content)
+            np.testing.assert_array_equal(loaded[:, 1:].astype(dtype), expected)
+
     def test_export_cost_matrix_empty(self):
         """Testa exportação de matriz vazia."""
         import tempfile
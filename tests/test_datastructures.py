@@ -40,6 +40,28 @@ class TestFilaPrioridade(unittest.TestCase):
         with self.assertRaises(IndexError):
             self.pq.get()
 
+    def test_equal_priority_fifo(self):
+        """Testa desempate FIFO entre itens de mesma prioridade."""
+        self.pq.put({'id': 1}, 1)
+        self.pq.put({'id': 2}, 1)
+        self.pq.put({'id': 3}, 1)
+
+        self.assertEqual(self.pq.get(), {'id': 1})
+        self.assertEqual(self.pq.get(), {'id': 2})
+        self.assertEqual(self.pq.get(), {'id': 3})
+
+    def test_truncate_keeps_best(self):
+        """Testa que truncate() mantém apenas os itens de menor prioridade."""
+        for priority in [7, 3, 9, 1, 5]:
+            self.pq.put(priority, priority)
+
+        self.pq.truncate(2)
+
+        self.assertEqual(len(self.pq), 2)
+        self.assertEqual(self.pq.get(), 1)
+        self.assertEqual(self.pq.get(), 3)
+        self.assertTrue(self.pq.is_empty())
+
 
 class TestFila(unittest.TestCase):
     """Testa a Fila (FIFO)."""
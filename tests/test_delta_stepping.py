@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Testes unitários para o delta-stepping sobre arrays CSR.
+"""
+
+import unittest
+import sys
+import os
+import networkx as nx
+import numpy as np
+from unittest.mock import patch
+from scipy.sparse.csgraph import dijkstra as csgraph_dijkstra
+
+# Adiciona o diretório pai ao path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dijkstra
+from dijkstra import graph_to_csr, multi_source_distances
+from delta_stepping import default_delta, delta_stepping_csr, multi_source_delta_stepping
+
+
+class TestDeltaStepping(unittest.TestCase):
+    """Testa o delta-stepping contra o Dijkstra do scipy."""
+
+    def setUp(self):
+        """Cria um grafo aleatório com pesos leves, pesados e zero."""
+        rng = np.random.default_rng(5)
+        self.graph = nx.MultiDiGraph()
+        self.graph.add_nodes_from(range(60))
+        for _ in range(240):
+            u, v = rng.integers(0, 60, size=2)
+            weight = float(rng.choice([0.0, rng.uniform(0, 5), rng.uniform(50, 200)]))
+            self.graph.add_edge(int(u), int(v), length=weight)
+        self.csr, self.nodes, _ = graph_to_csr(self.graph)
+
+    def test_single_source_matches_csgraph(self):
+        """Testa várias larguras de balde (inclusive a padrão)."""
+        for delta in (0.5, default_delta(self.csr.data), 1000.0):
+            for source in range(0, 60, 9):
+                distances = delta_stepping_csr(self.csr.indptr, self.csr.indices,
+                                               self.csr.data, source, delta)
+                expected = csgraph_dijkstra(self.csr, directed=True, indices=source)
+                np.testing.assert_allclose(distances, expected)
+
+    def test_multi_source(self):
+        """Testa a versão multi-origem e o despacho em multi_source_distances."""
+        sources = np.array([0, 17, 42], dtype=np.int64)
+        expected = csgraph_dijkstra(self.csr, directed=True, indices=sources)
+        result = multi_source_delta_stepping(self.csr.indptr, self.csr.indices, self.csr.data,
+                                             sources, default_delta(self.csr.data))
+        np.testing.assert_allclose(result, expected)
+
+        node_index = {node: i for i, node in enumerate(dijkstra.get_csr(self.graph)[1])}
+        indices = np.array([node_index[node] for node in (0, 17, 42)])
+        with patch('dijkstra.get_num_threads', return_value=4):
+            np.testing.assert_allclose(multi_source_distances(self.graph, indices), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
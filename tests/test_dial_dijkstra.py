@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Testes unitários para o Dijkstra com fila de baldes (Dial).
+"""
+
+import unittest
+import sys
+import os
+import networkx as nx
+import numpy as np
+from scipy.sparse.csgraph import dijkstra as csgraph_dijkstra
+
+# Adiciona o diretório pai ao path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dijkstra import graph_to_csr, reconstruct_path_array, find_path_dijkstra
+from dial_dijkstra import dial_csr, dial_weights, MAX_BUCKETS
+
+
+class TestDialDijkstra(unittest.TestCase):
+    """Testa o kernel de baldes contra o Dijkstra do scipy."""
+
+    def setUp(self):
+        """Cria um grafo aleatório com pesos na grade de centésimos (inclui zero)."""
+        rng = np.random.default_rng(11)
+        self.graph = nx.MultiDiGraph()
+        self.graph.add_nodes_from(range(40))
+        for _ in range(150):
+            u, v = rng.integers(0, 40, size=2)
+            self.graph.add_edge(int(u), int(v), length=float(rng.integers(0, 400)) / 100)
+        self.csr, self.nodes, self.node_index = graph_to_csr(self.graph)
+
+    def test_dial_weights(self):
+        """Testa a conversão para unidades de balde e os casos recusados."""
+        units, num_buckets = dial_weights(np.array([1.0, 2.0, 0.0, 3.5]))
+        np.testing.assert_array_equal(units, [2, 4, 0, 7])
+        self.assertEqual(num_buckets, 8)
+
+        self.assertIsNone(dial_weights(np.array([1.0, 0.123])))
+        self.assertIsNone(dial_weights(np.array([1.0, -2.0])))
+        self.assertIsNone(dial_weights(np.array([0.01, MAX_BUCKETS / 100])))
+
+    def test_matches_csgraph(self):
+        """Testa distâncias completas e com parada antecipada contra o csgraph."""
+        units, num_buckets = dial_weights(self.csr.data)
+        for source in range(0, 40, 7):
+            expected = csgraph_dijkstra(self.csr, directed=True, indices=source)
+            distances, predecessors = dial_csr(self.csr.indptr, self.csr.indices, self.csr.data,
+                                               units, num_buckets, source, -1)
+            np.testing.assert_allclose(distances, expected)
+
+            for target in np.flatnonzero(np.isfinite(distances)):
+                path = reconstruct_path_array(predecessors, self.nodes, source, target)
+                self.assertEqual(path[0], source)
+                self.assertEqual(path[-1], target)
+
+                early, _ = dial_csr(self.csr.indptr, self.csr.indices, self.csr.data,
+                                    units, num_buckets, source, target)
+                self.assertAlmostEqual(early[target], expected[target])
+
+    def test_find_path_grid(self):
+        """Testa find_path_dijkstra em uma grade de pesos unitários."""
+        grid = nx.convert_node_labels_to_integers(nx.grid_2d_graph(10, 10).to_directed())
+        nx.set_edge_attributes(grid, 1.0, 'length')
+        path, distance = find_path_dijkstra(grid, 0, 99)
+        self.assertEqual(distance, 18.0)
+        self.assertEqual(len(path), 19)
+
+
+if __name__ == '__main__':
+    unittest.main()
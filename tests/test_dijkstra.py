@@ -17,18 +17,23 @@ from dijkstra import (
     reconstruct_path, 
     get_shortest_distance,
     get_all_shortest_distances,
-    validate_graph_for_dijkstra
+    validate_graph_for_dijkstra,
+    graph_to_csr,
+    get_csr,
+    reconstruct_path_array,
+    single_source_dijkstra
 )
 
 class TestDijkstra(unittest.TestCase):
     """Testa as funções do módulo Dijkstra."""
     
-    def setUp(self):
-        """Configuração inicial para os testes."""
+    @classmethod
+    def setUpClass(cls):
+        """Configuração inicial compartilhada (os grafos não são alterados pelos testes)."""
         # Cria grafo de teste simples
-        self.graph = nx.DiGraph()
-        self.graph.add_nodes_from([0, 1, 2, 3, 4])
-        self.graph.add_edges_from([
+        cls.graph = nx.DiGraph()
+        cls.graph.add_nodes_from([0, 1, 2, 3, 4])
+        cls.graph.add_edges_from([
             (0, 1, {'length': 10.0}),
             (0, 2, {'length': 15.0}),
             (1, 3, {'length': 8.0}),
@@ -38,9 +43,9 @@ class TestDijkstra(unittest.TestCase):
         ])
         
         # Grafo com pesos negativos (inválido para Dijkstra)
-        self.invalid_graph = nx.DiGraph()
-        self.invalid_graph.add_nodes_from([0, 1, 2])
-        self.invalid_graph.add_edges_from([
+        cls.invalid_graph = nx.DiGraph()
+        cls.invalid_graph.add_nodes_from([0, 1, 2])
+        cls.invalid_graph.add_edges_from([
             (0, 1, {'length': 10.0}),
             (1, 2, {'length': -5.0})  # Peso negativo
         ])
@@ -67,9 +72,10 @@ class TestDijkstra(unittest.TestCase):
     
     def test_find_path_dijkstra_no_path(self):
         """Testa quando não há caminho entre os nós."""
-        # Adiciona nó isolado
-        self.graph.add_node(5)
-        path, distance = find_path_dijkstra(self.graph, 0, 5)
+        # Adiciona nó isolado (em uma cópia do grafo compartilhado)
+        graph = self.graph.copy()
+        graph.add_node(5)
+        path, distance = find_path_dijkstra(graph, 0, 5)
         self.assertEqual(path, [])
         self.assertEqual(distance, float('inf'))
     
@@ -110,6 +116,100 @@ class TestDijkstra(unittest.TestCase):
         self.assertEqual(distances[3], 18.0)  # 0->1->3
         self.assertAlmostEqual(distances[4], 23.0, places=1)  # 0->1->3->4
     
+    def test_get_all_shortest_distances_multigraph(self):
+        """Testa arestas paralelas: vale a de menor peso (não o peso padrão)."""
+        multigraph = nx.MultiDiGraph()
+        multigraph.add_edge(0, 1, length=7.0)
+        multigraph.add_edge(0, 1, length=2.0)
+        multigraph.add_edge(1, 2, length=4.0)
+        multigraph.add_node(3)
+        
+        distances = get_all_shortest_distances(multigraph, 0)
+        self.assertEqual(distances, {0: 0.0, 1: 2.0, 2: 6.0, 3: float('inf')})
+        self.assertEqual(get_all_shortest_distances(self.invalid_graph, 0), {0: 0.0, 1: 10.0, 2: 5.0})
+        self.assertEqual(get_shortest_distance(self.invalid_graph, 0, 2), 5.0)
+    
+    def test_reconstruct_path_array(self):
+        """Testa reconstrução por índices, sem caminho e com ciclo nos predecessores."""
+        nodes = [10, 11, 12, 13]
+        self.assertEqual(reconstruct_path_array(np.array([-1, 0, 1, -9999]), nodes, 0, 2), [10, 11, 12])
+        self.assertEqual(reconstruct_path_array(np.array([-1, 0, 1, -9999]), nodes, 0, 3), [])
+        self.assertEqual(reconstruct_path_array(np.array([-1, 2, 1, -1]), nodes, 0, 2), [])
+        self.assertEqual(reconstruct_path_array(np.array([-1, 0, 1, 2]), nodes, 3, 3), [13])
+    
+    def test_find_path_dijkstra_matches_python_search(self):
+        """Testa o caminho via csgraph contra a busca em Python."""
+        for end in range(5):
+            path, distance = find_path_dijkstra(self.graph, 0, end)
+            distances, predecessors = single_source_dijkstra(self.graph, 0)
+            self.assertEqual(distance, distances[end])
+            self.assertEqual(path, reconstruct_path(predecessors, 0, end))
+    
+    def test_find_path_dijkstra_negative_weights_fallback(self):
+        """Testa que pesos negativos usam a busca em Python."""
+        path, distance = find_path_dijkstra(self.invalid_graph, 0, 2)
+        self.assertEqual(path, [0, 1, 2])
+        self.assertEqual(distance, 5.0)
+    
+    def test_get_csr_cache(self):
+        """Testa que a matriz CSR é reaproveitada e refeita quando o grafo muda."""
+        graph = self.graph.copy()
+        first = get_csr(graph)
+        self.assertIs(get_csr(graph), first)
+        
+        graph.add_edge(4, 0, length=1.0)
+        self.assertIsNot(get_csr(graph), first)
+        self.assertEqual(find_path_dijkstra(graph, 4, 1), ([4, 0, 1], 11.0))
+    
+    def test_get_csr_detects_edge_and_weight_changes(self):
+        """Testa que novas arestas e pesos alterados no lugar não deixam respostas antigas."""
+        graph = nx.DiGraph()
+        nx.add_path(graph, [0, 1, 2, 3], length=100.0)
+        self.assertEqual(find_path_dijkstra(graph, 0, 3), ([0, 1, 2, 3], 300.0))
+        
+        graph.add_edge(0, 3, length=150.0)
+        self.assertEqual(find_path_dijkstra(graph, 0, 3), ([0, 3], 150.0))
+        
+        graph[0][3]['length'] = 400.0
+        self.assertEqual(find_path_dijkstra(graph, 0, 3), ([0, 1, 2, 3], 300.0))
+        self.assertEqual(get_shortest_distance(graph, 0, 3), 300.0)
+        
+        # Uma tupla guardada pelo chamador continua valendo para o grafo da montagem
+        owned = get_csr(graph)
+        graph[0][3]['length'] = 50.0
+        self.assertEqual(find_path_dijkstra(graph, 0, 3, owned), ([0, 1, 2, 3], 300.0))
+        self.assertEqual(find_path_dijkstra(graph, 0, 3), ([0, 3], 50.0))
+    
+    def test_graph_to_csr(self):
+        """Testa conversão para CSR com arestas paralelas e peso zero."""
+        multigraph = nx.MultiDiGraph()
+        multigraph.add_nodes_from([0, 1, 2, 3])
+        multigraph.add_edge(0, 1, length=5.0)
+        multigraph.add_edge(0, 1, length=2.0)
+        multigraph.add_edge(1, 2, length=0.0)
+        multigraph.add_edge(2, 3)  # Sem peso: ignorada em MultiDiGraph
+        
+        csr, nodes, node_index = graph_to_csr(multigraph)
+        
+        self.assertEqual(nodes, [0, 1, 2, 3])
+        self.assertEqual(csr.shape, (4, 4))
+        self.assertEqual(csr.nnz, 2)
+        self.assertEqual(csr[node_index[0], node_index[1]], 2.0)
+        self.assertIn(node_index[2], csr[node_index[1]].indices)
+    
+    def test_graph_to_csr_mixed_weight_keys(self):
+        """Testa grafo em que só parte das arestas tem 'length' (regra geral)."""
+        graph = nx.DiGraph()
+        graph.add_edge(0, 1, length=4.0, weight=9.0)
+        graph.add_edge(1, 2, weight=3.0)
+        graph.add_edge(2, 0)
+        
+        csr, _, node_index = graph_to_csr(graph)
+        dense = csr.toarray()
+        self.assertEqual(dense[node_index[0], node_index[1]], 4.0)
+        self.assertEqual(dense[node_index[1], node_index[2]], 3.0)
+        self.assertEqual(dense[node_index[2], node_index[0]], 1.0)
+    
     def test_validate_graph_for_dijkstra_valid(self):
         """Testa validação de grafo válido."""
         self.assertTrue(validate_graph_for_dijkstra(self.graph))
@@ -146,8 +246,9 @@ class TestDijkstra(unittest.TestCase):
 class TestDijkstraPerformance(unittest.TestCase):
     """Testa performance do algoritmo Dijkstra."""
     
-    def test_large_graph_performance(self):
-        """Testa performance com grafo maior."""
+    @classmethod
+    def setUpClass(cls):
+        """Monta a grade uma única vez para a classe."""
         # Cria grafo em grade 10x10
         graph = nx.DiGraph()
         size = 10
@@ -173,6 +274,12 @@ class TestDijkstraPerformance(unittest.TestCase):
                     down = (i + 1) * size + j
                     graph.add_edge(current, down, length=1.0)
         
+        cls.graph, cls.size = graph, size
+    
+    def test_large_graph_performance(self):
+        """Testa performance com grafo maior."""
+        graph, size = self.graph, self.size
+        
         # Testa caminho de canto superior esquerdo para canto inferior direito
         start = 0
         end = size * size - 1
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Testes unitários para o kernel de Dijkstra sobre arrays CSR.
+"""
+
+import unittest
+import sys
+import os
+import networkx as nx
+import numpy as np
+from scipy.sparse.csgraph import dijkstra as csgraph_dijkstra
+
+# Adiciona o diretório pai ao path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dijkstra import graph_to_csr, reconstruct_path_array
+from dijkstra_numba import dijkstra_csr
+
+
+class TestDijkstraNumba(unittest.TestCase):
+    """Testa o kernel contra o Dijkstra do scipy."""
+
+    def setUp(self):
+        """Cria um grafo aleatório com arestas paralelas e de peso zero."""
+        rng = np.random.default_rng(7)
+        self.graph = nx.MultiDiGraph()
+        self.graph.add_nodes_from(range(40))
+        for _ in range(150):
+            u, v = rng.integers(0, 40, size=2)
+            self.graph.add_edge(int(u), int(v), length=float(rng.integers(0, 20)))
+        self.csr, self.nodes, self.node_index = graph_to_csr(self.graph)
+
+    def test_all_targets_match_csgraph(self):
+        """Testa distâncias completas (target=-1) contra o csgraph."""
+        for source in range(0, 40, 7):
+            distances, predecessors = dijkstra_csr(self.csr.indptr, self.csr.indices,
+                                                   self.csr.data, source, -1)
+            expected = csgraph_dijkstra(self.csr, directed=True, indices=source)
+            np.testing.assert_allclose(distances, expected)
+
+            for target in np.flatnonzero(np.isfinite(distances)):
+                path = reconstruct_path_array(predecessors, self.nodes, source, target)
+                length = sum(min(data['length'] for data in self.graph.get_edge_data(u, v).values())
+                             for u, v in zip(path, path[1:]))
+                self.assertAlmostEqual(length, distances[target])
+
+    def test_early_exit_target(self):
+        """Testa que a distância até o destino é final mesmo com parada antecipada."""
+        expected = csgraph_dijkstra(self.csr, directed=True, indices=0)
+        for target in range(40):
+            distances, _ = dijkstra_csr(self.csr.indptr, self.csr.indices,
+                                        self.csr.data, 0, target)
+            self.assertEqual(distances[target], expected[target])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,12 +7,14 @@ import unittest
 import sys
 import os
 import networkx as nx
+import numpy as np
 from unittest.mock import patch, MagicMock
 
 # Adiciona o diretório pai ao path para importar módulos
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from graph_parser import GraphParser
+from dijkstra import csr_from_soa, graph_to_csr
 
 
 class TestGraphParser(unittest.TestCase):
@@ -63,24 +65,81 @@ class TestGraphParser(unittest.TestCase):
         mock_ox.add_edge_speeds.assert_called_once()
         mock_ox.add_edge_travel_times.assert_called_once()
 
-    @patch('graph_parser.ox.distance.nearest_nodes')
-    def test_get_closest_node(self, mock_nearest_nodes):
-        """Testa get_closest_node() e a lógica robusta."""
-
-        # Simula que o grafo já foi construído
+    def test_to_soa(self):
+        """Testa a conversão do grafo em arrays e a CSR montada a partir deles."""
+        graph = nx.MultiDiGraph()
+        graph.add_node(900, y=-23.5, x=-46.6)
+        graph.add_node(15, y=-23.6, x=-46.7)
+        graph.add_node(42, y=-23.7, x=-46.8)
+        graph.add_edge(900, 15, length=50.0)
+        graph.add_edge(900, 15, length=30.0)
+        graph.add_edge(15, 42, length=0.0)
+        graph.add_edge(42, 900)  # Sem peso: ignorada em MultiDiGraph
+        self.parser.graph = graph
+
+        soa = self.parser.to_soa()
+        self.assertIs(self.parser.to_soa(), soa)
+        np.testing.assert_array_equal(soa['node_ids'], [900, 15, 42])
+        np.testing.assert_array_equal(soa['node_xy'][1], [-46.7, -23.6])
+        np.testing.assert_array_equal(soa['edge_src'], [0, 0, 1])
+        np.testing.assert_array_equal(soa['edge_dst'], [1, 1, 2])
+        np.testing.assert_array_equal(soa['edge_len'], [50.0, 30.0, 0.0])
+
+        np.testing.assert_array_equal(self.parser.node_positions([42, 900]), [2, 0])
+        with self.assertRaises(ValueError):
+            self.parser.node_positions([7])
+
+        csr, nodes, node_index = csr_from_soa(soa)
+        expected, expected_nodes, _ = graph_to_csr(graph)
+        self.assertEqual(nodes, expected_nodes)
+        self.assertEqual(node_index, {900: 0, 15: 1, 42: 2})
+        self.assertEqual(csr.nnz, expected.nnz)
+        np.testing.assert_array_equal(csr.toarray(), expected.toarray())
+
+
+    def test_to_soa_refreshes_on_graph_changes(self):
+        """Testa que arestas novas e pesos alterados no lugar refazem os arrays."""
+        graph = nx.MultiDiGraph()
+        graph.add_node(1, y=0.0, x=0.0)
+        graph.add_node(2, y=0.0, x=0.01)
+        graph.add_edge(1, 2, length=10.0)
+        self.parser.graph = graph
+        first = self.parser.to_soa()
+
+        graph.add_edge(2, 1, length=20.0)
+        second = self.parser.to_soa()
+        self.assertIsNot(second, first)
+        np.testing.assert_array_equal(second['edge_src'], [0, 1])
+
+        graph[1][2][0]['length'] = 5.0
+        np.testing.assert_array_equal(self.parser.to_soa()['edge_len'], [5.0, 20.0])
+    def test_get_closest_node(self):
+        """Testa get_closest_node() com a busca em árvore (sem osmnx)."""
         self.parser.graph = self.mock_graph
 
-        # Teste 1: Simula retorno como array (versões antigas do osmnx)
-        mock_nearest_nodes.return_value = [1]
-        node = self.parser.get_closest_node(10.0, 10.0)
-        self.assertEqual(node, 1)
-        mock_nearest_nodes.assert_called_with(self.mock_graph, X=10.0, Y=10.0)
-
-        # Teste 2: Simula retorno como int (versões novas do osmnx)
-        mock_nearest_nodes.return_value = 2
-        node = self.parser.get_closest_node(10.1, 10.1)
-        self.assertEqual(node, 2)
-        mock_nearest_nodes.assert_called_with(self.mock_graph, X=10.1, Y=10.1)
+        self.assertEqual(self.parser.get_closest_node(10.0, 10.0), 1)
+        self.assertEqual(self.parser.get_closest_node(10.09, 10.12), 2)
+        self.assertIsInstance(self.parser.get_closest_node(10.0, 10.0), int)
+
+    def test_get_closest_nodes_batch(self):
+        """Testa a consulta em lote contra a busca exaustiva por haversine."""
+        from a_star import haversine_distance
+
+        rng = np.random.default_rng(0)
+        graph = nx.MultiDiGraph()
+        for node, (lat, lon) in enumerate(zip(rng.uniform(-23.7, -23.4, 300),
+                                              rng.uniform(-46.8, -46.4, 300))):
+            graph.add_node(node * 7, y=lat, x=lon)
+        self.parser.graph = graph
+
+        lats = rng.uniform(-23.7, -23.4, 50)
+        lons = rng.uniform(-46.8, -46.4, 50)
+        found = self.parser.get_closest_nodes_batch(lons, lats)
+
+        for lat, lon, node in zip(lats, lons, found):
+            best = min(haversine_distance(lat, lon, d['y'], d['x']) for _, d in graph.nodes(data=True))
+            chosen = graph.nodes[int(node)]
+            self.assertLessEqual(haversine_distance(lat, lon, chosen['y'], chosen['x']), best * 1.01)
 
     def test_get_node_attributes(self):
         """Testa obtenção de atributos de nó."""
@@ -0,0 +1,262 @@
+import unittest
+import sys
+import os
+import networkx as nx
+from datetime import datetime, timedelta
+from unittest.mock import patch
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from graph_parser import GraphParser
+from vehicle_allocation import Client, VehicleAllocationManager
+from vrp import Vehicle, DeliveryRequest
+from dijkstra import get_shortest_distance
+from cost_matrix import compute_cost_matrix
+
+
+class FakeGraphParser(GraphParser):
+    """GraphParser sobre um grafo em memória (sem osmnx)."""
+
+    def __init__(self, graph):
+        self.graph = graph
+        self._soa = None
+        self._node_relabel = None
+        self._kdtree = None
+
+
+class TestVehicleAllocationManager(unittest.TestCase):
+    """Testa o gerenciador de alocação de veículos."""
+
+    def setUp(self):
+        """Configuração inicial com um grafo pequeno e dois veículos."""
+        self.graph = nx.MultiDiGraph()
+        for node, (lat, lon) in enumerate([(-23.550, -46.630), (-23.551, -46.631),
+                                           (-23.552, -46.632), (-23.553, -46.633)]):
+            self.graph.add_node(node, y=lat, x=lon)
+        self.graph.add_edge(0, 1, length=100.0)
+        self.graph.add_edge(1, 2, length=150.0)
+        self.graph.add_edge(2, 3, length=120.0)
+        self.graph.add_edge(3, 0, length=400.0)
+        self.graph.add_edge(1, 0, length=100.0)
+
+        self.manager = VehicleAllocationManager(FakeGraphParser(self.graph))
+        self.manager.add_vehicle(Vehicle(id=1, capacity=100.0, current_node=0))
+        self.manager.add_vehicle(Vehicle(id=2, capacity=100.0, current_node=3))
+        self.manager.add_client(Client(id=1, name="Cliente A", location=(-23.552, -46.632), priority=3))
+        self.manager.add_client(Client(id=2, name="Cliente B", location=(-23.551, -46.631), priority=1))
+
+    def _request(self, client_id, weight=10.0):
+        delivery = DeliveryRequest(id=client_id, pickup_location=(0.0, 0.0),
+                                   delivery_location=(0.0, 0.0), weight=weight)
+        return self.manager.create_allocation_request(client_id, delivery)
+
+    def test_add_client_resolves_node(self):
+        """Testa que o nó mais próximo é atribuído ao cliente."""
+        self.assertEqual(self.manager.clients[1].node_id, 2)
+        self.assertEqual(self.manager.clients[2].node_id, 1)
+
+    def test_add_clients_and_vehicles_batch(self):
+        """Testa a inclusão em lote com uma única consulta de nós próximos."""
+        clients = [Client(id=3, name="Cliente C", location=(-23.5531, -46.6329)),
+                   Client(id=4, name="Cliente D", location=(-23.550, -46.630), node_id=2)]
+        vehicles = [Vehicle(id=3, capacity=10.0, current_location=(-23.5509, -46.6311))]
+        parser = self.manager.graph_parser
+        with patch.object(parser, 'get_closest_nodes_batch',
+                          wraps=parser.get_closest_nodes_batch) as batch:
+            self.manager.add_clients(clients)
+            self.manager.add_vehicles(vehicles)
+
+        self.assertEqual(batch.call_count, 2)
+        self.assertEqual(self.manager.clients[3].node_id, 3)
+        self.assertEqual(self.manager.clients[4].node_id, 2)
+        self.assertEqual(self.manager.vehicles[3].current_node, 1)
+
+    def test_calculate_allocation_cost_matches_dijkstra(self):
+        """Testa o custo (distância + penalidade de prioridade) sem matriz de custo."""
+        request = self._request(1)
+        for vehicle in self.manager.vehicles.values():
+            distance = get_shortest_distance(self.graph, vehicle.current_node, 2)
+            expected = distance + (4 - 3) * 0.1 * distance
+            self.assertAlmostEqual(self.manager.calculate_allocation_cost(vehicle, request), expected)
+
+    def test_calculate_allocation_cost_unknown_node(self):
+        """Testa nó fora do grafo: custo infinito."""
+        vehicle = Vehicle(id=3, capacity=10.0, current_node=999)
+        self.assertEqual(self.manager.calculate_allocation_cost(vehicle, self._request(1)),
+                         float('inf'))
+
+    def test_solve_greedy(self):
+        """Testa que a solução gulosa escolhe o veículo mais próximo."""
+        requests = [self._request(1), self._request(2)]
+        solution = self.manager.solve_allocation_problem(requests)
+
+        self.assertEqual(len(solution.allocations), 2)
+        self.assertEqual(solution.unassigned_requests, [])
+        chosen = {a.client.id: a.vehicle.id for a in solution.allocations}
+        self.assertEqual(chosen, {1: 1, 2: 1})
+        # Cliente B (prioridade 1): 100 * 1.3; Cliente A (prioridade 3): 250 * 1.1
+        self.assertAlmostEqual(solution.total_cost, 130.0 + 275.0)
+        self.assertEqual(sorted(a.cost for a in solution.allocations), [130.0, 275.0])
+
+    def test_solve_greedy_computes_each_cost_once(self):
+        """Testa que, com matriz de custo externa, cada custo é calculado uma vez."""
+        self.manager.cost_matrix = compute_cost_matrix(self.graph, list(self.graph.nodes), algorithm='dijkstra')
+        requests = [self._request(1), self._request(2)]
+        calls = []
+        original = self.manager.calculate_allocation_cost
+
+        def counting_cost(vehicle, request):
+            calls.append((vehicle.id, request.id))
+            return original(vehicle, request)
+
+        self.manager.calculate_allocation_cost = counting_cost
+        solution = self.manager.solve_allocation_problem(requests)
+
+        # Dois veículos candidatos por solicitação, nenhuma chamada extra no total
+        self.assertEqual(len(calls), 4)
+        self.assertAlmostEqual(solution.total_cost, 130.0 + 275.0)
+
+    def test_solve_greedy_vectorized_matches_per_vehicle(self):
+        """Testa a seleção vetorizada contra allocate_vehicle_greedy em uma grade."""
+        grid = nx.MultiDiGraph()
+        for i in range(6):
+            for j in range(6):
+                grid.add_node(i * 6 + j, y=-23.55 - i * 0.001, x=-46.63 - j * 0.001)
+        for i in range(6):
+            for j in range(6):
+                for di, dj in ((0, 1), (1, 0), (0, -1), (-1, 0)):
+                    if 0 <= i + di < 6 and 0 <= j + dj < 6:
+                        grid.add_edge(i * 6 + j, (i + di) * 6 + j + dj, length=float(10 + (i * 7 + j * 3) % 5))
+
+        def solve(vectorized):
+            manager = VehicleAllocationManager(FakeGraphParser(grid))
+            for k, node in enumerate([0, 5, 14, 21, 30, 35]):
+                manager.add_vehicle(Vehicle(id=k, capacity=25.0 + 10 * (k % 3), current_node=node))
+            requests = []
+            for k in range(18):
+                manager.add_client(Client(id=k, name=f"C{k}", location=(0.0, 0.0),
+                                          node_id=(k * 11) % 36, priority=1 + k % 3))
+                delivery = DeliveryRequest(id=k, pickup_location=(0.0, 0.0),
+                                           delivery_location=(0.0, 0.0), weight=8.0 + 3 * (k % 4))
+                requests.append(manager.create_allocation_request(k, delivery))
+            if not vectorized:
+                manager._greedy_fleet = lambda: None
+            solution = manager.solve_allocation_problem(requests)
+            return ([(a.client.id, a.vehicle.id, a.cost) for a in solution.allocations],
+                    [r.id for r in solution.unassigned_requests])
+
+        vectorized, per_vehicle = solve(True), solve(False)
+        self.assertEqual(vectorized, per_vehicle)
+        self.assertTrue(vectorized[1])
+
+    def test_solve_greedy_uses_interest_matrix(self):
+        """Testa que a solução gulosa não faz buscas por par com a matriz de interesse."""
+        requests = [self._request(1), self._request(2)]
+        with patch('vehicle_allocation.get_shortest_distance_by_index') as pair_search:
+            solution = self.manager.solve_allocation_problem(requests)
+
+        pair_search.assert_not_called()
+        self.assertAlmostEqual(solution.total_cost, 130.0 + 275.0)
+
+    def test_interest_matrix_invalidated_and_chunked(self):
+        """Testa a matriz de interesse: invalidação e cálculo em blocos."""
+        self.manager._ensure_cost_matrix()
+        self.assertEqual(self.manager._interest_matrix.shape, (4, 4))
+
+        self.manager.add_vehicle(Vehicle(id=3, capacity=10.0, current_node=1))
+        self.assertIsNone(self.manager._interest_matrix)
+
+        with patch('vehicle_allocation._INTEREST_CHUNK', 1):
+            self.manager._ensure_cost_matrix()
+        matrix, index = self.manager._interest_matrix, self.manager._interest_index
+        for source in index:
+            for target in index:
+                self.assertEqual(matrix[index[source], index[target]],
+                                 get_shortest_distance(self.graph, source, target))
+
+    def test_capacity_leaves_request_unassigned(self):
+        """Testa solicitação acima da capacidade de todos os veículos."""
+        solution = self.manager.solve_allocation_problem([self._request(1, weight=500.0)])
+        self.assertEqual(solution.allocations, [])
+        self.assertEqual(len(solution.unassigned_requests), 1)
+
+    def test_over_capacity_vehicle_skipped_before_checks(self):
+        """Testa que veículos sem capacidade não chegam à verificação nem ao custo."""
+        self.manager.vehicles[1].current_load = 95.0
+        with patch.object(self.manager, '_is_vehicle_available',
+                          wraps=self.manager._is_vehicle_available) as check, \
+             patch.object(self.manager, 'calculate_allocation_cost',
+                          wraps=self.manager.calculate_allocation_cost) as cost:
+            allocation = self.manager.allocate_vehicle_greedy(self._request(1))
+
+        self.assertEqual(allocation.vehicle.id, 2)
+        self.assertEqual([c.args[0].id for c in check.call_args_list], [2])
+        self.assertEqual([c.args[0].id for c in cost.call_args_list], [2])
+
+    def test_allocations_indexed_by_vehicle(self):
+        """Testa o índice de alocações por veículo na alocação e no cancelamento."""
+        first = self.manager.allocate_vehicle_greedy(self._request(1))
+        busy = first.vehicle.id
+        self.assertEqual(self.manager._alloc_by_vehicle[busy], [first])
+
+        # Só alocações confirmadas/em andamento entram na verificação de conflito
+        request = self._request(2)
+        with patch.object(self.manager, '_has_time_conflict', return_value=True):
+            self.assertIn(busy, [v.id for v in self.manager.find_available_vehicles(request)])
+            self.manager.update_allocation_status(1, "confirmed")
+            self.assertNotIn(busy, [v.id for v in self.manager.find_available_vehicles(request)])
+
+            self.manager.cancel_allocation(1)
+            self.assertEqual(self.manager._alloc_by_vehicle[busy], [])
+            self.assertIn(busy, [v.id for v in self.manager.find_available_vehicles(request)])
+    def test_ids_unique_after_removal(self):
+        """Testa que IDs de solicitações e alocações não se repetem após remoções."""
+        first = self._request(1)
+        del self.manager.allocation_requests[first.id]
+        self.assertNotEqual(self._request(1).id, first.id)
+
+        self.manager.allocate_vehicle_greedy(self._request(1))
+        del self.manager.allocations[1]
+        self.manager.allocate_vehicle_greedy(self._request(2))
+        self.assertEqual(list(self.manager.allocations), [2])
+
+    def test_solve_greedy_request_order(self):
+        """Testa a ordem de atendimento: prioridade, depois criação (estável)."""
+        base = datetime(2024, 1, 1, 12, 0)
+        requests = [self._request(1), self._request(2), self._request(1), self._request(2)]
+        for request, minutes in zip(requests, [5, 9, 1, 9]):
+            request.created_at = base + timedelta(minutes=minutes)
+
+        order = []
+        original = self.manager._record_allocation
+        self.manager._record_allocation = lambda v, r, now, cost: order.append(r.id) or original(v, r, now, cost)
+        self.manager.solve_allocation_problem(requests)
+
+        expected = sorted(requests, key=lambda r: (r.client.priority, r.created_at))
+        self.assertEqual(order, [r.id for r in expected])
+        self.assertEqual(order, [requests[1].id, requests[3].id, requests[2].id, requests[0].id])
+
+    def test_dataclasses_use_slots(self):
+        """Testa que os dataclasses do módulo não carregam __dict__."""
+        client = self.manager.clients[1]
+        self.assertFalse(hasattr(client, '__dict__'))
+        with self.assertRaises(AttributeError):
+            client.unknown_attribute = 1
+
+    def test_requested_vehicle_type(self):
+        """Testa o filtro por tipo: veículo sem atributo 'type' atende qualquer tipo."""
+        delivery = DeliveryRequest(id=9, pickup_location=(0.0, 0.0),
+                                   delivery_location=(0.0, 0.0), weight=1.0)
+        request = self.manager.create_allocation_request(1, delivery, requested_vehicle_type="van")
+        vehicle = self.manager.vehicles[1]
+        now = datetime.now()
+
+        self.assertEqual(self.manager._is_vehicle_available(vehicle, request, now),
+                         not hasattr(vehicle, 'type') or vehicle.type == "van")
+        with patch.object(Vehicle, 'type', "van", create=True):
+            self.assertTrue(self.manager._is_vehicle_available(vehicle, request, now))
+        with patch.object(Vehicle, 'type', "truck", create=True):
+            self.assertFalse(self.manager._is_vehicle_available(vehicle, request, now))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,27 +1,33 @@
 import unittest
 import sys
+from unittest import mock
 import os
+import networkx as nx
+import numpy as np
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from vrp import DeliveryRequest, Vehicle, Route, VRPManager, NearestNeighborVRP
+from vrp import DeliveryRequest, Vehicle, Route, VRPManager, NearestNeighborVRP, _nn_build_route
 from graph_parser import GraphParser
+import dijkstra
+from dijkstra import get_all_shortest_distances
 
 class TestVRPModule(unittest.TestCase):
     """Testa o módulo VRP."""
     
-    def setUp(self):
-        """Configuração inicial para os testes."""
-        self.graph_parser = GraphParser("São Paulo, Brazil")
+    @classmethod
+    def setUpClass(cls):
+        """Configuração inicial compartilhada (os testes só leem estes dados)."""
+        cls.graph_parser = GraphParser("São Paulo, Brazil")
         # Para testes, vamos usar um grafo mock
-        self.mock_graph = None
+        cls.mock_graph = None
         
         # Dados de teste
-        self.vehicles = [
+        cls.vehicles = [
             Vehicle(id=1, capacity=100.0),
             Vehicle(id=2, capacity=150.0)
         ]
         
-        self.deliveries = [
+        cls.deliveries = [
             DeliveryRequest(
                 id=1,
                 pickup_location=(-23.5505, -46.6333),  # São Paulo
@@ -36,7 +42,7 @@ class TestVRPModule(unittest.TestCase):
             )
         ]
         
-        self.depot_location = (-23.5505, -46.6333)
+        cls.depot_location = (-23.5505, -46.6333)
     
     def test_delivery_request_creation(self):
         """Testa criação de DeliveryRequest."""
@@ -75,6 +81,14 @@ class TestVRPModule(unittest.TestCase):
         self.assertEqual(route.total_distance, 10.5)
         self.assertTrue(route.is_feasible)
     
+    def test_dataclasses_use_slots(self):
+        """Testa que DeliveryRequest, Vehicle e Route não carregam __dict__."""
+        route = Route(vehicle_id=1, deliveries=[self.deliveries[0]])
+        for instance in (self.deliveries[0], self.vehicles[0], route):
+            self.assertFalse(hasattr(instance, '__dict__'))
+        with self.assertRaises(AttributeError):
+            route.unknown_attribute = 1
+
     def test_nearest_neighbor_vrp_initialization(self):
         """Testa inicialização do NearestNeighborVRP."""
         vrp = NearestNeighborVRP()
@@ -116,6 +130,22 @@ class TestVRPModule(unittest.TestCase):
         result = manager._validate_inputs(self.vehicles, self.deliveries, None)
         self.assertFalse(result)
     
+    def test_validate_routes(self):
+        """Testa a marcação de rotas sem veículo ou acima da capacidade."""
+        manager = VRPManager(self.graph_parser)
+        heavy = DeliveryRequest(id=3, pickup_location=(0.0, 0.0), delivery_location=(0.0, 0.0), weight=120.0)
+        routes = [Route(vehicle_id=1, deliveries=[heavy]), Route(vehicle_id=2, deliveries=[heavy]),
+                  Route(vehicle_id=7, deliveries=[])]
+        manager._validate_routes(routes, self.vehicles + [Vehicle(id=2, capacity=50.0)])
+
+        self.assertEqual([r.is_feasible for r in routes], [False, True, False])
+
+        light = DeliveryRequest(id=4, pickup_location=(0.0, 0.0), delivery_location=(0.0, 0.0), weight=60.0)
+        routes = [Route(vehicle_id=1, deliveries=[]), Route(vehicle_id=1, deliveries=[light, light]),
+                  Route(vehicle_id=2, deliveries=[light, light])]
+        manager._validate_routes(routes, self.vehicles)
+        self.assertEqual([r.is_feasible for r in routes], [True, False, True])
+
     def test_get_solution_stats_empty(self):
         """Testa estatísticas de solução vazia."""
         manager = VRPManager(self.graph_parser)
@@ -139,6 +169,197 @@ class TestVRPModule(unittest.TestCase):
         self.assertEqual(stats['total_deliveries'], 2)
         self.assertEqual(stats['average_route_distance'], 12.5)
         self.assertEqual(stats['utilization_rate'], 1.0)
+        self.assertIsInstance(stats['total_distance'], float)
+        self.assertIsInstance(stats['total_deliveries'], int)
+
+class TestNearestNeighborVRP(unittest.TestCase):
+    """Testa a construção de rotas do Nearest Neighbor sobre um grafo pequeno."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Cria um grafo em linha 0-1-2-3-4 (arestas de 1 km nos dois sentidos) e um nó isolado."""
+        cls.graph = nx.MultiDiGraph()
+        for u in range(4):
+            cls.graph.add_edge(u, u + 1, length=1000.0)
+            cls.graph.add_edge(u + 1, u, length=1000.0)
+        cls.graph.add_edge(0, 2, length=1500.0)
+        cls.graph.add_node(9)
+
+    def _delivery(self, id, pickup, delivery, weight=10.0):
+        return DeliveryRequest(id=id, pickup_location=(0.0, 0.0), delivery_location=(0.0, 0.0),
+                               pickup_node=pickup, delivery_node=delivery, weight=weight)
+
+    def test_solve_routes_and_distances(self):
+        """Testa ordem das entregas, distância total e entregas sem caminho."""
+        deliveries = [self._delivery(1, 1, 4), self._delivery(2, 0, 2), self._delivery(3, 1, 9)]
+        vrp = NearestNeighborVRP()
+        routes = vrp.solve(self.graph, [Vehicle(id=1, capacity=100.0)], deliveries,
+                           (0.0, 0.0), depot_node=0)
+
+        self.assertEqual(len(routes), 1)
+        self.assertEqual([d.id for d in routes[0].deliveries], [2, 1])
+        # 0->0 (0) + 0->2 (1.5) + 2->1 (1) + 1->4 (3) + volta 4->0 (4; atalho 0->2 é de mão única)
+        self.assertAlmostEqual(routes[0].total_distance, 9.5)
+        self.assertEqual(vrp.dist.shape, (5, 5))
+        self.assertEqual(vrp.dist.dtype, np.float32)
+        self.assertAlmostEqual(vrp._distance(0, 4), 3.5)
+        self.assertAlmostEqual(vrp._distance(4, 0), 4.0)
+        self.assertEqual(vrp._distance(0, 9), float('inf'))
+
+    def test_build_route_reads_precomputed_distances(self):
+        """Testa que montar a rota não dispara buscas de caminho por trecho."""
+        deliveries = [self._delivery(1, 1, 4), self._delivery(2, 0, 2)]
+        with mock.patch('networkx.shortest_path', side_effect=AssertionError), \
+                mock.patch('networkx.shortest_path_length', side_effect=AssertionError):
+            routes = NearestNeighborVRP().solve(self.graph, [Vehicle(id=1, capacity=100.0)], deliveries,
+                                                (0.0, 0.0), depot_node=0)
+
+        self.assertAlmostEqual(routes[0].total_distance, 9.5)
+
+    def test_precompute_distances_negative_weights(self):
+        """Testa que pesos negativos (sem ciclo negativo) caem na busca por origem."""
+        graph = nx.DiGraph()
+        graph.add_edge(0, 1, length=2000.0)
+        graph.add_edge(1, 2, length=-500.0)
+        graph.add_edge(0, 2, length=1800.0)
+        vrp = NearestNeighborVRP()
+        vrp.graph, vrp.depot_node = graph, 0
+        vrp._precompute_distances([self._delivery(1, 1, 2)])
+
+        lengths = get_all_shortest_distances(graph, 0)
+        self.assertAlmostEqual(vrp._distance(0, 2), lengths[2] / 1000.0, places=5)
+        self.assertAlmostEqual(vrp._distance(0, 1), 2.0)
+        self.assertEqual(vrp._distance(2, 0), float('inf'))
+
+    def test_solve_respects_capacity(self):
+        """Testa que cada veículo só leva o que cabe na capacidade."""
+        deliveries = [self._delivery(1, 0, 1, weight=60.0), self._delivery(2, 0, 3, weight=60.0)]
+        vehicles = [Vehicle(id=1, capacity=100.0), Vehicle(id=2, capacity=100.0)]
+        routes = NearestNeighborVRP().solve(self.graph, vehicles, deliveries, (0.0, 0.0), depot_node=0)
+
+        self.assertEqual([[d.id for d in r.deliveries] for r in routes], [[1], [2]])
+
+    def test_solve_tracks_equal_deliveries_by_identity(self):
+        """Testa que entregas iguais (mesmos campos) são roteadas uma vez cada."""
+        deliveries = [self._delivery(1, 0, 1, weight=60.0), self._delivery(1, 0, 1, weight=60.0)]
+        vehicles = [Vehicle(id=1, capacity=100.0), Vehicle(id=2, capacity=100.0)]
+        routes = NearestNeighborVRP().solve(self.graph, vehicles, deliveries, (0.0, 0.0), depot_node=0)
+
+        self.assertEqual(len(routes), 2)
+        self.assertIs(routes[0].deliveries[0], deliveries[0])
+        self.assertIs(routes[1].deliveries[0], deliveries[1])
+
+    def test_solve_parallel(self):
+        """Testa o modo paralelo: rotas crescem juntas e conflitos vão ao veículo de menor índice."""
+        deliveries = [self._delivery(1, 0, 1, weight=40.0), self._delivery(2, 0, 3, weight=40.0),
+                      self._delivery(3, 0, 2, weight=40.0), self._delivery(4, 0, 4, weight=40.0),
+                      self._delivery(5, 1, 9, weight=10.0)]
+        vehicles = [Vehicle(id=1, capacity=100.0), Vehicle(id=2, capacity=100.0), Vehicle(id=3, capacity=5.0)]
+        routes = NearestNeighborVRP(parallel=True).solve(self.graph, vehicles, deliveries,
+                                                         (0.0, 0.0), depot_node=0)
+
+        self.assertEqual([r.vehicle_id for r in routes], [1, 2])
+        self.assertEqual([[d.id for d in r.deliveries] for r in routes], [[1, 3], [2, 4]])
+        # Veículo 1: 0->1 (1) + 1->0->2 (2.5) + volta 2->0 (2); veículo 2: 0->3 (2.5) + 3->0->4 (6.5) + volta 4
+        self.assertAlmostEqual(routes[0].total_distance, 5.5)
+        self.assertAlmostEqual(routes[1].total_distance, 13.0)
+        self.assertIn('parallel_nearest_neighbor', VRPManager(None).algorithms)
+
+    def test_nn_build_route_kernel(self):
+        """Testa o laço compilado direto sobre a matriz: ordem, capacidade e entregas sem caminho."""
+        inf = float('inf')
+        dist = np.array([[0.0, 1.0, 2.0],
+                         [1.0, 0.0, inf],
+                         [2.0, 1.0, 0.0]], dtype=np.float32)
+        pickup_rows = np.array([0, 1, 0, -1])
+        delivery_rows = np.array([2, 2, 1, 1])
+        weights = np.array([10.0, 10.0, 95.0, 10.0])
+
+        available = np.ones(4, dtype=bool)
+        order, total = _nn_build_route(dist, pickup_rows, delivery_rows, weights, available, 100.0, 0)
+        # 2 é a mais próxima e lota o veículo: 0->0 + 0->1 + volta 1->0
+        self.assertEqual(order.tolist(), [2])
+        self.assertAlmostEqual(total, 2.0)
+
+        order, total = _nn_build_route(dist, pickup_rows, delivery_rows, weights, available, 50.0, 0)
+        # 2 não cabe; 3 não tem coleta; 1 fica sem caminho 1->2 e é descartada
+        self.assertEqual(order.tolist(), [0])
+        self.assertAlmostEqual(total, 0.0 + 2.0 + 2.0)
+
+        order, total = _nn_build_route(dist, pickup_rows, delivery_rows, weights, available, 100.0, -1)
+        self.assertEqual(order.size, 0)
+        self.assertEqual(total, 0.0)
+
+        # Só entregas marcadas em 'available' são escolhidas; a máscara não é alterada
+        available[2] = False
+        order, total = _nn_build_route(dist, pickup_rows, delivery_rows, weights, available, 100.0, 0)
+        self.assertEqual(order.tolist(), [0])
+        self.assertEqual(available.tolist(), [True, True, False, True])
+
+
+class FakeGraphParser(GraphParser):
+    """GraphParser sobre um grafo em memória (sem osmnx)."""
+
+    def __init__(self, graph):
+        self.graph = graph
+        self._soa = None
+        self._node_relabel = None
+        self._kdtree = None
+
+
+class TestVRPManagerSolve(unittest.TestCase):
+    """Testa solve_vrp sobre um grafo pequeno com coordenadas."""
+
+    def setUp(self):
+        """Cria um grafo em linha 0-1-2 (arestas de 1 km) com nós em (lat=0, lon=i/100)."""
+        self.graph = nx.MultiDiGraph()
+        for node in range(3):
+            self.graph.add_node(node, x=node / 100.0, y=0.0)
+        for u in range(2):
+            self.graph.add_edge(u, u + 1, length=1000.0)
+            self.graph.add_edge(u + 1, u, length=1000.0)
+        self.manager = VRPManager(FakeGraphParser(self.graph))
+
+    def _deliveries(self):
+        return [DeliveryRequest(id=1, pickup_location=(0.0, 0.01), delivery_location=(0.0, 0.02), weight=10.0)]
+
+    def test_solve_vrp_reuses_csr(self):
+        """Testa que a CSR do grafo é montada uma única vez entre resoluções."""
+        vehicles = [Vehicle(id=1, capacity=100.0)]
+        with mock.patch('dijkstra.csr_from_soa', wraps=dijkstra.csr_from_soa) as build:
+            first = self.manager.solve_vrp(vehicles, self._deliveries(), (0.0, 0.0))
+            second = self.manager.solve_vrp(vehicles, self._deliveries(), (0.0, 0.0))
+
+        self.assertEqual(build.call_count, 1)
+        self.assertAlmostEqual(first[0].total_distance, 4.0)
+        self.assertAlmostEqual(second[0].total_distance, 4.0)
+
+    def test_map_locations_to_nodes_batched(self):
+        """Testa que coletas, entregas e depósito são localizados em uma única consulta."""
+        deliveries = self._deliveries()
+        parser = self.manager.graph_parser
+        with mock.patch.object(parser, 'get_closest_nodes_batch',
+                               wraps=parser.get_closest_nodes_batch) as batch:
+            depot_node = self.manager._map_locations_to_nodes(deliveries, (0.0, 0.0))
+
+        batch.assert_called_once()
+        self.assertEqual(depot_node, 0)
+        self.assertEqual((deliveries[0].pickup_node, deliveries[0].delivery_node), (1, 2))
+        self.assertIsInstance(depot_node, int)
+
+    def test_map_locations_to_nodes_single_point_parser(self):
+        """Testa parsers que só oferecem get_closest_node (consulta ponto a ponto)."""
+        class PointParser:
+            def get_closest_node(self, lat, lon):
+                return int(round(lon * 100))
+
+        deliveries = self._deliveries()
+        manager = VRPManager(PointParser())
+        depot_node = manager._map_locations_to_nodes(deliveries, (0.0, 0.0))
+
+        self.assertEqual(depot_node, 0)
+        self.assertEqual((deliveries[0].pickup_node, deliveries[0].delivery_node), (1, 2))
+
 
 if __name__ == '__main__':
     unittest.main()
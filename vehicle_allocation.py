@@ -4,12 +4,20 @@ Prototipo flexível que suporta futuros algoritmos de otimização.
 """
 
 from typing import List, Dict, Tuple, Optional, Any
+from collections import defaultdict
+from itertools import count
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
+import numpy as np
 from vrp import Vehicle, DeliveryRequest
 from cost_matrix import get_cost_between_nodes
+from dijkstra import get_csr, get_shortest_distance_by_index, multi_source_distances
+from a_star import get_shortest_distance_a_star
 
-@dataclass
+# Origens por chamada multi-origem em _ensure_cost_matrix (memória: bloco x V)
+_INTEREST_CHUNK = 256
+
+@dataclass(slots=True)
 class Client:
     """Representa um cliente no sistema."""
     id: int
@@ -22,7 +30,7 @@ class Client:
     time_window_end: Optional[datetime] = None
     special_requirements: List[str] = field(default_factory=list)
     
-@dataclass
+@dataclass(slots=True)
 class AllocationRequest:
     """Representa uma solicitação de alocação de veículo."""
     id: int
@@ -32,7 +40,7 @@ class AllocationRequest:
     max_wait_time: Optional[float] = None 
     created_at: datetime = field(default_factory=datetime.now)
 
-@dataclass
+@dataclass(slots=True)
 class VehicleAllocation:
     """Representa a alocação de um veículo para um cliente."""
     vehicle: Vehicle
@@ -43,8 +51,9 @@ class VehicleAllocation:
     route_to_client: Optional[List[int]] = None
     route_from_client: Optional[List[int]] = None
     status: str = "pending" 
+    cost: float = 0.0
 
-@dataclass
+@dataclass(slots=True)
 class AllocationSolution:
     """Representa uma solução completa de alocação."""
     allocations: List[VehicleAllocation]
@@ -66,6 +75,21 @@ class VehicleAllocationManager:
         self.vehicles: Dict[int, Vehicle] = {}
         self.allocation_requests: Dict[int, AllocationRequest] = {}
         self.allocations: Dict[int, VehicleAllocation] = {}
+        # IDs monotônicos: continuam únicos mesmo após remoções dos dicionários
+        self._next_request_id = count(1)
+        self._next_allocation_id = count(1)
+        # Alocações de cada veículo, mantidas junto com self.allocations
+        self._alloc_by_vehicle: Dict[int, List[VehicleAllocation]] = defaultdict(list)
+        # Arrays do grafo (uma passada pelo NetworkX), a partir dos quais a CSR
+        # é montada uma vez; o gerenciador trata o grafo como fixo e repassa a
+        # tupla às buscas, sem reconferir o grafo a cada consulta
+        self._soa = graph_parser.to_soa()
+        self._graph_csr = get_csr(self.graph, self._soa)
+        self._csr, self._csr_nodes, self._node_index = self._graph_csr
+        # Matriz de distâncias entre nós de interesse, criada sob demanda
+        # (ver _ensure_cost_matrix) e descartada ao adicionar clientes/veículos
+        self._interest_matrix: Optional[np.ndarray] = None
+        self._interest_index: Dict[int, int] = {}
         
     def add_client(self, client: Client) -> None:
         """Adiciona um cliente ao sistema."""
@@ -74,6 +98,7 @@ class VehicleAllocationManager:
                 client.location[0], client.location[1]
             )
         self.clients[client.id] = client
+        self._interest_matrix = None
         
     def add_vehicle(self, vehicle: Vehicle) -> None:
         """Adiciona um veículo à frota."""
@@ -82,6 +107,35 @@ class VehicleAllocationManager:
                 vehicle.current_location[0], vehicle.current_location[1]
             )
         self.vehicles[vehicle.id] = vehicle
+        self._interest_matrix = None
+        
+    def add_clients(self, clients: List[Client]) -> None:
+        """Adiciona vários clientes, localizando os nós em uma única consulta."""
+        pending = [client for client in clients if client.node_id is None]
+        if pending:
+            nodes = self.graph_parser.get_closest_nodes_batch(
+                [client.location[1] for client in pending],
+                [client.location[0] for client in pending]
+            )
+            for client, node in zip(pending, nodes.tolist()):
+                client.node_id = node
+        
+        for client in clients:
+            self.add_client(client)
+        
+    def add_vehicles(self, vehicles: List[Vehicle]) -> None:
+        """Adiciona vários veículos, localizando os nós em uma única consulta."""
+        pending = [vehicle for vehicle in vehicles if vehicle.current_node is None]
+        if pending:
+            nodes = self.graph_parser.get_closest_nodes_batch(
+                [vehicle.current_location[1] for vehicle in pending],
+                [vehicle.current_location[0] for vehicle in pending]
+            )
+            for vehicle, node in zip(pending, nodes.tolist()):
+                vehicle.current_node = node
+        
+        for vehicle in vehicles:
+            self.add_vehicle(vehicle)
         
     def create_allocation_request(self, 
                                 client_id: int, 
@@ -92,7 +146,7 @@ class VehicleAllocationManager:
             raise ValueError(f"Cliente {client_id} não encontrado")
             
         client = self.clients[client_id]
-        request_id = len(self.allocation_requests) + 1
+        request_id = next(self._next_request_id)
         
         request = AllocationRequest(
             id=request_id,
@@ -111,31 +165,31 @@ class VehicleAllocationManager:
         if current_time is None:
             current_time = datetime.now()
             
-        available_vehicles = []
+        # Filtro de capacidade primeiro: barato e dispensa a varredura de
+        # alocações de _is_vehicle_available para veículos já descartados
+        weight = request.delivery_request.weight
+        candidates = [vehicle for vehicle in self.vehicles.values()
+                      if vehicle.current_load + weight <= vehicle.capacity]
         
-        for vehicle in self.vehicles.values():
-            if self._is_vehicle_available(vehicle, request, current_time):
-                available_vehicles.append(vehicle)
-                
-        return available_vehicles
+        return [vehicle for vehicle in candidates
+                if self._is_vehicle_available(vehicle, request, current_time)]
         
     def _is_vehicle_available(self, 
                             vehicle: Vehicle, 
                             request: AllocationRequest,
                             current_time: datetime) -> bool:
         """Verifica se um veículo está disponível para uma solicitação."""
-        if request.requested_vehicle_type and hasattr(vehicle, 'type'):
-            if vehicle.type != request.requested_vehicle_type:
+        requested_type = request.requested_vehicle_type
+        if requested_type:
+            # Veículo sem atributo 'type' atende qualquer tipo
+            if getattr(vehicle, 'type', requested_type) != requested_type:
                 return False
-                
+        
         if vehicle.current_load + request.delivery_request.weight > vehicle.capacity:
             return False
             
-        vehicle_allocations = [a for a in self.allocations.values() 
-                             if a.vehicle.id == vehicle.id and a.status in ["confirmed", "in_progress"]]
-        
-        if vehicle_allocations:
-            for allocation in vehicle_allocations:
+        for allocation in self._alloc_by_vehicle.get(vehicle.id, ()):
+            if allocation.status in ("confirmed", "in_progress"):
                 if self._has_time_conflict(allocation, request, current_time):
                     return False
                     
@@ -160,17 +214,63 @@ class VehicleAllocationManager:
                 request.client.node_id
             )
         else:
-            from a_star import get_shortest_distance_a_star
-            cost = get_shortest_distance_a_star(
-                self.graph,
-                vehicle.current_node,
-                request.client.node_id
-            )
+            cost = self._interest_cost(vehicle.current_node, request.client.node_id)
             
         priority_penalty = (4 - request.client.priority) * 0.1 * cost
         
         return cost + priority_penalty
         
+    def _ensure_cost_matrix(self) -> None:
+        """
+        Calcula, se ainda não existir, a matriz de distâncias entre os nós de
+        interesse (nós atuais dos veículos e nós dos clientes).
+        
+        As origens são processadas em blocos de _INTEREST_CHUNK por chamada
+        multi-origem, limitando a memória intermediária a bloco x V; de cada
+        bloco só as colunas dos nós de interesse são guardadas (k x k).
+        """
+        if self._interest_matrix is not None or self.cost_matrix:
+            return
+        
+        candidates = [vehicle.current_node for vehicle in self.vehicles.values()]
+        candidates += [client.node_id for client in self.clients.values()]
+        nodes = [node for node in dict.fromkeys(candidates) if node in self._node_index]
+        indices = np.array([self._node_index[node] for node in nodes], dtype=np.int64)
+        
+        matrix = np.empty((len(nodes), len(nodes)))
+        for start in range(0, len(nodes), _INTEREST_CHUNK):
+            distances = multi_source_distances(self.graph, indices[start:start + _INTEREST_CHUNK],
+                                               self._graph_csr)
+            if distances is None:
+                # Pesos negativos: as consultas seguem par a par
+                return
+            matrix[start:start + _INTEREST_CHUNK] = distances[:, indices]
+        
+        self._interest_index = {node: i for i, node in enumerate(nodes)}
+        self._interest_matrix = matrix
+        
+    def _interest_cost(self, source: int, target: int) -> float:
+        """Distância pela matriz de interesse; pares fora dela são buscados no grafo."""
+        self._ensure_cost_matrix()
+        
+        if self._interest_matrix is not None:
+            i = self._interest_index.get(source)
+            j = self._interest_index.get(target)
+            if i is not None and j is not None:
+                return float(self._interest_matrix[i, j])
+        
+        return self._shortest_distance(source, target)
+        
+    def _shortest_distance(self, source: int, target: int) -> float:
+        """Distância mínima pela CSR pré-computada; nós fora dela usam A*."""
+        source_index = self._node_index.get(source)
+        target_index = self._node_index.get(target)
+        
+        if source_index is None or target_index is None:
+            return get_shortest_distance_a_star(self.graph, source, target)
+        
+        return get_shortest_distance_by_index(self.graph, source_index, target_index, self._graph_csr)
+        
     def allocate_vehicle_greedy(self, 
                                request: AllocationRequest,
                                current_time: datetime = None) -> Optional[VehicleAllocation]:
@@ -183,24 +283,104 @@ class VehicleAllocationManager:
         if not available_vehicles:
             return None
             
-        best_vehicle = min(available_vehicles, 
-                          key=lambda v: self.calculate_allocation_cost(v, request))
+        # Custo de cada candidato calculado uma única vez e guardado na alocação
+        costs = {v.id: self.calculate_allocation_cost(v, request) for v in available_vehicles}
+        best_vehicle = min(available_vehicles, key=lambda v: costs[v.id])
         
+        return self._record_allocation(best_vehicle, request, current_time, costs[best_vehicle.id])
+        
+    def _record_allocation(self, 
+                          vehicle: Vehicle, 
+                          request: AllocationRequest,
+                          current_time: datetime,
+                          cost: float) -> VehicleAllocation:
+        """Registra a alocação do veículo escolhido e atualiza sua carga."""
         allocation = VehicleAllocation(
-            vehicle=best_vehicle,
+            vehicle=vehicle,
             client=request.client,
             allocation_request=request,
             estimated_arrival=current_time + timedelta(minutes=30),  
-            estimated_departure=current_time + timedelta(minutes=60)
+            estimated_departure=current_time + timedelta(minutes=60),
+            cost=cost
         )
         
-        best_vehicle.current_load += request.delivery_request.weight
+        vehicle.current_load += request.delivery_request.weight
         
-        allocation_id = len(self.allocations) + 1
+        allocation_id = next(self._next_allocation_id)
         self.allocations[allocation_id] = allocation
+        self._alloc_by_vehicle[vehicle.id].append(allocation)
         
         return allocation
         
+    def _greedy_fleet(self) -> Optional[Tuple[List[Vehicle], np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Fotografa a frota em arrays para a seleção vetorizada de _solve_greedy.
+        
+        Returns:
+            Tupla (veículos, linhas na matriz de interesse, cargas, capacidades,
+            indicador de alocações confirmadas/em andamento) ou None quando a
+            seleção precisa do caminho por veículo (matriz de custo externa ou
+            nó de veículo fora da matriz de interesse)
+        """
+        if self.cost_matrix:
+            return None
+        
+        self._ensure_cost_matrix()
+        if self._interest_matrix is None:
+            return None
+        
+        vehicles = list(self.vehicles.values())
+        rows = [self._interest_index.get(vehicle.current_node) for vehicle in vehicles]
+        if any(row is None for row in rows):
+            return None
+        
+        count = len(vehicles)
+        loads = np.fromiter((v.current_load for v in vehicles), dtype=np.float64, count=count)
+        capacities = np.fromiter((v.capacity for v in vehicles), dtype=np.float64, count=count)
+        active = np.fromiter((any(a.status in ("confirmed", "in_progress")
+                                  for a in self._alloc_by_vehicle.get(v.id, ()))
+                              for v in vehicles), dtype=bool, count=count)
+        
+        return vehicles, np.array(rows, dtype=np.int64), loads, capacities, active
+        
+    def _allocate_vectorized(self, 
+                            request: AllocationRequest,
+                            current_time: datetime,
+                            fleet: Tuple[List[Vehicle], np.ndarray, np.ndarray, np.ndarray, np.ndarray]) -> Optional[VehicleAllocation]:
+        """
+        Mesma escolha de allocate_vehicle_greedy, com filtro de capacidade e
+        custos calculados em arrays sobre a matriz de interesse.
+        
+        _is_vehicle_available só é consultado onde ainda pode recusar o
+        veículo: quando há tipo solicitado ou alocações ativas.
+        """
+        vehicles, rows, loads, capacities, active = fleet
+        
+        column = self._interest_index.get(request.client.node_id)
+        if column is None:
+            allocation = self.allocate_vehicle_greedy(request, current_time)
+            loads[:] = [vehicle.current_load for vehicle in vehicles]
+            return allocation
+        
+        weight = request.delivery_request.weight
+        feasible = loads + weight <= capacities
+        needs_check = feasible if request.requested_vehicle_type else feasible & active
+        for i in np.flatnonzero(needs_check):
+            if not self._is_vehicle_available(vehicles[i], request, current_time):
+                feasible[i] = False
+        
+        candidates = np.flatnonzero(feasible)
+        if candidates.size == 0:
+            return None
+        
+        distances = self._interest_matrix[rows[candidates], column]
+        costs = distances + (4 - request.client.priority) * 0.1 * distances
+        best = int(np.argmin(costs))
+        chosen = int(candidates[best])
+        
+        loads[chosen] += weight
+        return self._record_allocation(vehicles[chosen], request, current_time, float(costs[best]))
+        
     def solve_allocation_problem(self, 
                                requests: List[AllocationRequest],
                                algorithm: str = "greedy") -> AllocationSolution:
@@ -216,19 +396,27 @@ class VehicleAllocationManager:
         unassigned_requests = []
         current_time = datetime.now()
         
-        sorted_requests = sorted(requests, 
-                               key=lambda r: (r.client.priority, r.created_at))
+        # Ordena por (prioridade, criação) com chaves numéricas em C; o
+        # lexsort é estável, como o sorted que substitui
+        priorities = np.fromiter((r.client.priority for r in requests), dtype=np.int64, count=len(requests))
+        timestamps = np.fromiter((r.created_at.timestamp() for r in requests), dtype=np.float64, count=len(requests))
+        sorted_requests = [requests[i] for i in np.lexsort((timestamps, priorities))]
+        
+        # Frota em arrays (nós, cargas, capacidades) uma vez por resolução
+        fleet = self._greedy_fleet() if sorted_requests else None
         
         for request in sorted_requests:
-            allocation = self.allocate_vehicle_greedy(request, current_time)
+            if fleet is not None:
+                allocation = self._allocate_vectorized(request, current_time, fleet)
+            else:
+                allocation = self.allocate_vehicle_greedy(request, current_time)
             
             if allocation:
                 allocations.append(allocation)
             else:
                 unassigned_requests.append(request)
                 
-        total_cost = sum(self.calculate_allocation_cost(a.vehicle, a.allocation_request) 
-                        for a in allocations)
+        total_cost = sum(a.cost for a in allocations)
         
         solution = AllocationSolution(
             allocations=allocations,
@@ -284,5 +472,7 @@ class VehicleAllocationManager:
         allocation.vehicle.current_load -= allocation.allocation_request.delivery_request.weight
         
         allocation.status = "cancelled"
+        vehicle_allocations = self._alloc_by_vehicle[allocation.vehicle.id]
+        vehicle_allocations[:] = [a for a in vehicle_allocations if a is not allocation]
         
         return True
@@ -1,12 +1,178 @@
+import logging
 from typing import List, Dict, Tuple, Optional, Any
 from dataclasses import dataclass
 from datastructures import filaPrioridade, Fila, Pilha
 import networkx as nx
+import numpy as np
+import osmnx as ox
 from abc import ABC, abstractmethod
-from dijkstra import find_path_dijkstra
-from a_star import find_path_a_star
+from dijkstra import get_all_shortest_distances, get_csr, multi_source_distances
+from numba_compat import njit, prange
 
-@dataclass
+logger = logging.getLogger(__name__)
+
+
+# Assinatura explícita: compilado uma vez na importação (e lido da cache nas
+# seguintes), sem fastmath, que pressupõe ausência de inf (pares sem caminho)
+@njit('Tuple((i8[:], f8))(f4[:, :], i8[:], i8[:], f8[:], b1[:], f8, i8)', cache=True)
+def _nn_build_route(dist, pickup_rows, delivery_rows, weights, available, capacity, depot_row):
+    """
+    Laço do nearest neighbor sobre a matriz de distâncias pré-computada.
+
+    A cada passo escolhe, entre as entregas ainda disponíveis que cabem na
+    carga restante, a de menor distância finita até o nó de entrega (primeira
+    em caso de empate). Entregas sem caminho até a coleta ou da coleta até a
+    entrega são descartadas sem entrar na rota (e seguem livres em 'available',
+    que não é alterada).
+
+    Args:
+        dist: Matriz float32 de distâncias (km) entre os nós relevantes
+        pickup_rows, delivery_rows: Linha de cada coleta/entrega em dist (-1 se ausente)
+        weights: Peso de cada entrega
+        available: Máscara das entregas que ainda podem ser escolhidas
+        capacity: Capacidade do veículo
+        depot_row: Linha do depósito em dist (-1 se ausente)
+
+    Returns:
+        Tupla (índices das entregas na ordem da rota, distância total em km)
+    """
+    n = weights.shape[0]
+    available = available.copy()
+    order = np.empty(n, dtype=np.int64)
+    count = 0
+    remaining = np.count_nonzero(available)
+    load = 0.0
+    total = 0.0
+    current = depot_row
+
+    while remaining > 0 and load < capacity:
+        best = -1
+        best_d = np.inf
+        if current >= 0:
+            for i in range(n):
+                if available[i] and weights[i] <= capacity - load and delivery_rows[i] >= 0:
+                    d = dist[current, delivery_rows[i]]
+                    if d < best_d:
+                        best = i
+                        best_d = d
+        if best == -1:
+            break
+
+        available[best] = False
+        remaining -= 1
+        pickup = pickup_rows[best]
+        if pickup < 0:
+            continue
+        to_pickup = dist[current, pickup]
+        to_delivery = dist[pickup, delivery_rows[best]]
+        if to_pickup == np.inf or to_delivery == np.inf:
+            continue
+
+        order[count] = best
+        count += 1
+        load += weights[best]
+        total += to_pickup + to_delivery
+        current = delivery_rows[best]
+
+    if count > 0 and current != depot_row and dist[current, depot_row] < np.inf:
+        total += dist[current, depot_row]
+
+    return order[:count], total
+
+
+@njit(cache=True, parallel=True)
+def _parallel_nn_build_routes(dist, pickup_rows, delivery_rows, weights, capacities, depot_row):
+    """
+    Nearest neighbor paralelo: todas as rotas crescem juntas, uma entrega por
+    rodada para cada veículo.
+
+    Em cada rodada os veículos escolhem em paralelo (mesmo critério de
+    _nn_build_route) entre as entregas ainda livres; em seguida as escolhas
+    são confirmadas em ordem de veículo, de modo que num conflito vence o
+    veículo de menor índice e os demais tentam de novo na rodada seguinte.
+    Uma entrega sem caminho a partir da posição de um veículo é descartada
+    apenas para aquele veículo.
+
+    Args:
+        dist: Matriz float32 de distâncias (km) entre os nós relevantes
+        pickup_rows, delivery_rows: Linha de cada coleta/entrega em dist (-1 se ausente)
+        weights: Peso de cada entrega
+        capacities: Capacidade de cada veículo
+        depot_row: Linha do depósito em dist (-1 se ausente)
+
+    Returns:
+        Tupla (entregas na ordem em que foram confirmadas, veículo de cada
+        uma, distância total em km de cada veículo)
+    """
+    n = weights.shape[0]
+    num_vehicles = capacities.shape[0]
+    available = np.ones(n, dtype=np.bool_)
+    rejected = np.zeros((num_vehicles, n), dtype=np.bool_)
+    active = np.ones(num_vehicles, dtype=np.bool_)
+    current = np.full(num_vehicles, depot_row, dtype=np.int64)
+    loads = np.zeros(num_vehicles)
+    totals = np.zeros(num_vehicles)
+    served = np.zeros(num_vehicles, dtype=np.int64)
+    proposals = np.empty(num_vehicles, dtype=np.int64)
+    sequence = np.empty(n, dtype=np.int64)
+    owner = np.empty(n, dtype=np.int64)
+    count = 0
+    remaining = n
+
+    while remaining > 0 and active.any():
+        for k in prange(num_vehicles):
+            best = -1
+            if active[k] and current[k] >= 0:
+                best_d = np.inf
+                for i in range(n):
+                    if (available[i] and not rejected[k, i] and delivery_rows[i] >= 0
+                            and weights[i] <= capacities[k] - loads[k]):
+                        d = dist[current[k], delivery_rows[i]]
+                        if d < best_d:
+                            best = i
+                            best_d = d
+            proposals[k] = best
+
+        for k in range(num_vehicles):
+            if not active[k]:
+                continue
+            best = proposals[k]
+            if best == -1:
+                active[k] = False
+                continue
+            if not available[best]:
+                continue
+
+            pickup = pickup_rows[best]
+            if pickup < 0:
+                available[best] = False
+                remaining -= 1
+                continue
+            to_pickup = dist[current[k], pickup]
+            to_delivery = dist[pickup, delivery_rows[best]]
+            if to_pickup == np.inf or to_delivery == np.inf:
+                rejected[k, best] = True
+                continue
+
+            available[best] = False
+            remaining -= 1
+            sequence[count] = best
+            owner[count] = k
+            count += 1
+            served[k] += 1
+            loads[k] += weights[best]
+            totals[k] += to_pickup + to_delivery
+            current[k] = delivery_rows[best]
+            if loads[k] >= capacities[k]:
+                active[k] = False
+
+    for k in range(num_vehicles):
+        if served[k] > 0 and current[k] != depot_row and dist[current[k], depot_row] < np.inf:
+            totals[k] += dist[current[k], depot_row]
+
+    return sequence[:count], owner[:count], totals
+
+@dataclass(slots=True)
 class DeliveryRequest:
     """Representa uma solicitação de entrega."""
     id: int
@@ -19,7 +185,7 @@ class DeliveryRequest:
     time_window_end: Optional[float] = None  
     priority: int = 1  
 
-@dataclass
+@dataclass(slots=True)
 class Vehicle:
     """Representa um veículo da frota."""
     id: int
@@ -30,7 +196,7 @@ class Vehicle:
     max_distance: Optional[float] = None 
     fuel_level: float = 100.0 
 
-@dataclass
+@dataclass(slots=True)
 class Route:
     """Representa uma rota de um veículo."""
     vehicle_id: int
@@ -52,11 +218,23 @@ class VRPAlgorithm(ABC):
         pass
 
 class NearestNeighborVRP(VRPAlgorithm):
-    """Implementa o algoritmo Nearest Neighbor para VRP."""
+    """
+    Implementa o algoritmo Nearest Neighbor para VRP.
+    
+    No modo sequencial (padrão) cada veículo completa sua rota antes do
+    próximo começar; com parallel=True as rotas de todos os veículos crescem
+    juntas, o que equilibra a carga entre eles (ver _parallel_nn_build_routes).
+    """
     
-    def __init__(self):
+    def __init__(self, parallel: bool = False):
+        self.parallel = parallel
         self.graph = None
         self.depot_node = None
+        # Distâncias (km) entre os nós relevantes da resolução atual
+        self.dist: Optional[np.ndarray] = None
+        self.node_index: Dict[int, int] = {}
+        # (linhas de coleta, linhas de entrega, pesos) das entregas da resolução atual
+        self.delivery_arrays: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
     
     def solve(self, 
               graph: nx.DiGraph,
@@ -67,123 +245,139 @@ class NearestNeighborVRP(VRPAlgorithm):
         """Resolve o VRP usando Nearest Neighbor."""
         self.graph = graph
         self.depot_node = depot_node if depot_node is not None else self._find_depot_node(depot_location)
+        self._precompute_distances(deliveries)
+        self.delivery_arrays = self._delivery_arrays(deliveries)
+        
+        if self.parallel:
+            return self._build_routes_parallel(vehicles, deliveries)
         
         routes = []
-        remaining_deliveries = deliveries.copy()
+        # Entregas ainda sem veículo, por posição em 'deliveries'
+        available = np.ones(len(deliveries), dtype=bool)
         
         for vehicle in vehicles:
-            if not remaining_deliveries:
+            if not available.any():
                 break
                 
-            route = self._build_route_nearest_neighbor(vehicle, remaining_deliveries)
+            route = self._build_route_nearest_neighbor(vehicle, deliveries, available)
             if route.deliveries:
                 routes.append(route)
-                for delivery in route.deliveries:
-                    if delivery in remaining_deliveries:
-                        remaining_deliveries.remove(delivery)
         
         return routes
     
+    def _build_routes_parallel(self,
+                               vehicles: List[Vehicle],
+                               deliveries: List[DeliveryRequest]) -> List[Route]:
+        """Constrói as rotas de todos os veículos ao mesmo tempo (_parallel_nn_build_routes)."""
+        pickup_rows, delivery_rows, weights = self.delivery_arrays
+        capacities = np.fromiter((v.capacity for v in vehicles), dtype=np.float64, count=len(vehicles))
+        
+        sequence, owner, totals = _parallel_nn_build_routes(
+            self.dist, pickup_rows, delivery_rows, weights, capacities,
+            self.node_index.get(self.depot_node, -1)
+        )
+        
+        route_deliveries = [[] for _ in vehicles]
+        for i, k in zip(sequence.tolist(), owner.tolist()):
+            route_deliveries[k].append(deliveries[i])
+        
+        return [
+            Route(vehicle_id=vehicle.id, deliveries=assigned,
+                  total_distance=float(total), is_feasible=True)
+            for vehicle, assigned, total in zip(vehicles, route_deliveries, totals.tolist())
+            if assigned
+        ]
+    
+    def _delivery_arrays(self, deliveries: List[DeliveryRequest]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Linhas de coleta/entrega em self.dist (-1 se ausentes) e pesos das entregas."""
+        n = len(deliveries)
+        pickup_rows = np.fromiter((self.node_index.get(d.pickup_node, -1) for d in deliveries),
+                                  dtype=np.int64, count=n)
+        delivery_rows = np.fromiter((self.node_index.get(d.delivery_node, -1) for d in deliveries),
+                                    dtype=np.int64, count=n)
+        weights = np.fromiter((d.weight for d in deliveries), dtype=np.float64, count=n)
+        return pickup_rows, delivery_rows, weights
+    
+    def _precompute_distances(self, deliveries: List[DeliveryRequest]) -> None:
+        """
+        Calcula uma vez por resolução as distâncias (km) entre o depósito e os
+        nós de coleta/entrega; as consultas seguintes são leituras em self.dist.
+        
+        Todas as origens vão em uma única chamada ao Dijkstra do csgraph sobre
+        a CSR em cache do grafo (multi_source_distances); grafos com pesos
+        negativos usam uma busca por origem.
+        
+        A matriz é guardada em float32 (resolução de centímetros na escala de
+        uma cidade): metade da memória percorrida a cada escolha do vizinho.
+        
+        Args:
+            deliveries: Entregas com pickup_node/delivery_node já definidos
+        """
+        candidates = [self.depot_node]
+        candidates += [d.pickup_node for d in deliveries]
+        candidates += [d.delivery_node for d in deliveries]
+        nodes = [node for node in dict.fromkeys(candidates)
+                 if node is not None and self.graph.has_node(node)]
+        
+        self.node_index = {node: i for i, node in enumerate(nodes)}
+        csr = get_csr(self.graph)
+        columns = np.fromiter((csr[2][node] for node in nodes), dtype=np.int64, count=len(nodes))
+        
+        distances = multi_source_distances(self.graph, columns, csr)
+        if distances is not None:
+            self.dist = (distances[:, columns] / 1000.0).astype(np.float32)
+            return
+        
+        self.dist = np.empty((len(nodes), len(nodes)), dtype=np.float32)
+        for i, source in enumerate(nodes):
+            lengths = get_all_shortest_distances(self.graph, source)
+            self.dist[i] = [lengths[target] / 1000.0 for target in nodes]
+    
+    def _distance(self, source: int, target: int) -> float:
+        """Distância (km) pré-computada; inf para nós fora da matriz ou sem caminho."""
+        i = self.node_index.get(source)
+        j = self.node_index.get(target)
+        if i is None or j is None:
+            return float('inf')
+        return float(self.dist[i, j])
+    
     def _find_depot_node(self, depot_location: Tuple[float, float]) -> int:
         """Encontra o nó do depósito mais próximo."""
-        from graph_parser import GraphParser
-
         if self.graph is None:
             return 0
         
-        import osmnx as ox
         return ox.distance.nearest_nodes(self.graph, X=depot_location[1], Y=depot_location[0])  
     
     def _build_route_nearest_neighbor(self, 
                                     vehicle: Vehicle, 
-                                    deliveries: List[DeliveryRequest]) -> Route:
-        """Constrói uma rota usando nearest neighbor."""
-        route_deliveries = []
-        current_node = self.depot_node
-        current_load = 0.0
-        total_distance = 0.0
-        
-        available_deliveries = deliveries.copy()
-        
-        while available_deliveries and current_load < vehicle.capacity:
-            nearest_delivery = self._find_nearest_delivery(
-                current_node, available_deliveries, vehicle.capacity - current_load
-            )
-            
-            if nearest_delivery is None:
-                break
+                                    deliveries: List[DeliveryRequest],
+                                    available: np.ndarray) -> Route:
+        """
+        Constrói uma rota usando nearest neighbor (laço compilado em _nn_build_route).
+        
+        Args:
+            vehicle: Veículo da rota
+            deliveries: Todas as entregas da resolução (somente leitura)
+            available: Máscara das entregas ainda sem veículo; as entregas
+                colocadas na rota são desmarcadas
             
-            if current_load + nearest_delivery.weight <= vehicle.capacity:
-                try:
-                    path_to_pickup = nx.shortest_path(self.graph, current_node, nearest_delivery.pickup_node, weight='length')
-                    distance_to_pickup = nx.shortest_path_length(self.graph, current_node, nearest_delivery.pickup_node, weight='length') / 1000.0  
-                    
-                    path_to_delivery = nx.shortest_path(self.graph, nearest_delivery.pickup_node, nearest_delivery.delivery_node, weight='length')
-                    distance_to_delivery = nx.shortest_path_length(self.graph, nearest_delivery.pickup_node, nearest_delivery.delivery_node, weight='length') / 1000.0  
-                    
-                    route_deliveries.append(nearest_delivery)
-                    current_load += nearest_delivery.weight
-                    total_distance += distance_to_pickup + distance_to_delivery
-                    current_node = nearest_delivery.delivery_node
-                    available_deliveries.remove(nearest_delivery)
-                except Exception:
-                    available_deliveries.remove(nearest_delivery)
-                    continue
-        
-        if route_deliveries and current_node != self.depot_node:
-            try:
-                return_path = nx.shortest_path(self.graph, current_node, self.depot_node, weight='length')
-                return_distance = nx.shortest_path_length(self.graph, current_node, self.depot_node, weight='length') / 1000.0  
-                total_distance += return_distance
-            except Exception:
-                pass
+        Returns:
+            Rota do veículo
+        """
+        pickup_rows, delivery_rows, weights = self.delivery_arrays
+        depot_row = self.node_index.get(self.depot_node, -1)
+        
+        order, total_distance = _nn_build_route(self.dist, pickup_rows, delivery_rows, weights,
+                                                available, float(vehicle.capacity), depot_row)
+        available[order] = False
+        route_deliveries = [deliveries[i] for i in order]
         
         return Route(
             vehicle_id=vehicle.id,
             deliveries=route_deliveries,
-            total_distance=total_distance,
+            total_distance=float(total_distance),
             is_feasible=len(route_deliveries) > 0
         )
-    
-    def _find_nearest_delivery(self, 
-                             current_node: int, 
-                             deliveries: List[DeliveryRequest],
-                             remaining_capacity: float) -> Optional[DeliveryRequest]:
-        """Encontra a entrega mais próxima que cabe no veículo."""
-        valid_deliveries = [d for d in deliveries if d.weight <= remaining_capacity]
-        
-        if not valid_deliveries:
-            return None
-        
-        nearest_delivery = None
-        min_distance = float('inf')
-        
-        for delivery in valid_deliveries:
-            try:
-                if not self.graph.has_node(current_node) or not self.graph.has_node(delivery.delivery_node):
-                    print(f"Debug: Nó não encontrado. Atual: {current_node}, delivery: {delivery.delivery_node}")
-                    continue
-               
-                try:
-                    path = nx.shortest_path(self.graph, current_node, delivery.delivery_node, weight='length')
-                    distance = nx.shortest_path_length(self.graph, current_node, delivery.delivery_node, weight='length') / 1000.0 
-                except nx.NetworkXNoPath:
-                    path, distance = find_path_dijkstra(self.graph, current_node, delivery.delivery_node)
-                    distance = distance / 1000.0 
-                if distance < min_distance and distance != float('inf'):
-                    min_distance = distance
-                    nearest_delivery = delivery
-                    print(f"Debug: Delivery {delivery.id} distancia: {distance:.2f}km")
-            except Exception as e:
-                print(f"Debug: Pathfinding falhou no delivery {delivery.id}: {e}")
-                continue
-        
-        if nearest_delivery:
-            print(f"Debug: Dellivery mais proximo encontrado {nearest_delivery.id} em {min_distance:.2f}km")
-        else:
-            print("Debug: Sem deliveries validos")
-        
-        return nearest_delivery
 
 class GeneticAlgorithmVRP(VRPAlgorithm):
     """Implementa algoritmo genético para VRP."""
@@ -215,6 +409,7 @@ class VRPManager:
         self.graph_parser = graph_parser
         self.algorithms = {
             'nearest_neighbor': NearestNeighborVRP(),
+            'parallel_nearest_neighbor': NearestNeighborVRP(parallel=True),
             'genetic_algorithm': GeneticAlgorithmVRP()
         }
     
@@ -229,6 +424,10 @@ class VRPManager:
             raise ValueError(f"Algoritmo '{algorithm}' não suportado")
         
         graph = self.graph_parser.get_graph()
+        # Monta a CSR (a partir dos arrays do parser, quando houver) só na
+        # primeira resolução sobre este grafo; as seguintes reutilizam a cache
+        soa = self.graph_parser.to_soa() if hasattr(self.graph_parser, 'to_soa') else None
+        get_csr(graph, soa)
         
         if not self._validate_inputs(vehicles, deliveries, depot_location):
             raise ValueError("Entradas inválidas para VRP")
@@ -265,19 +464,29 @@ class VRPManager:
                                deliveries: List[DeliveryRequest],
                                depot_location: Tuple[float, float]) -> int:
         """Mapeia localizações geográficas para nós do grafo."""
-        print("Debug: mapeando delivery para no nós do grafo...")
+        logger.debug("Mapeando deliveries para nós do grafo...")
         node_mapping = {} 
         
-        for delivery in deliveries:
-            delivery.pickup_node = self.graph_parser.get_closest_node(
-                delivery.pickup_location[0], delivery.pickup_location[1]
-            )
-            
-            delivery.delivery_node = self.graph_parser.get_closest_node(
-                delivery.delivery_location[0], delivery.delivery_location[1]
-            )
-            print(f"Debug: Delivery {delivery.id}: recolhido=({delivery.pickup_location[0]:.4f}, {delivery.pickup_location[1]:.4f}) -> no {delivery.pickup_node}")
-            print(f"Debug: Delivery {delivery.id}: delivery=({delivery.delivery_location[0]:.4f}, {delivery.delivery_location[1]:.4f}) -> no {delivery.delivery_node}")
+        # Coletas, entregas e depósito em uma única consulta (x=lon, y=lat);
+        # parsers sem a consulta em lote são consultados ponto a ponto
+        points = [d.pickup_location for d in deliveries]
+        points += [d.delivery_location for d in deliveries]
+        points.append(depot_location)
+        if hasattr(self.graph_parser, 'get_closest_nodes_batch'):
+            nodes = self.graph_parser.get_closest_nodes_batch(
+                [point[1] for point in points], [point[0] for point in points]
+            ).tolist()
+        else:
+            nodes = [self.graph_parser.get_closest_node(point[0], point[1]) for point in points]
+        
+        n = len(deliveries)
+        for delivery, pickup_node, delivery_node in zip(deliveries, nodes[:n], nodes[n:2 * n]):
+            delivery.pickup_node = pickup_node
+            delivery.delivery_node = delivery_node
+            logger.debug("Delivery %s: recolhido=(%.4f, %.4f) -> no %s", delivery.id,
+                         delivery.pickup_location[0], delivery.pickup_location[1], delivery.pickup_node)
+            logger.debug("Delivery %s: delivery=(%.4f, %.4f) -> no %s", delivery.id,
+                         delivery.delivery_location[0], delivery.delivery_location[1], delivery.delivery_node)
             
             if delivery.delivery_node not in node_mapping:
                 node_mapping[delivery.delivery_node] = []
@@ -285,21 +494,30 @@ class VRPManager:
         
         for node, delivery_ids in node_mapping.items():
             if len(delivery_ids) > 1:
-                print(f"Atencao: Multiplas rotas ({delivery_ids}) apontam pro mesmo no {node}")
+                logger.warning("Multiplas rotas (%s) apontam pro mesmo no %s", delivery_ids, node)
         
-        depot_node = self.graph_parser.get_closest_node(depot_location[0], depot_location[1])
-        print(f"Debug: Deposito ({depot_location[0]:.4f}, {depot_location[1]:.4f}) -> no {depot_node}")
+        depot_node = nodes[-1]
+        logger.debug("Deposito (%.4f, %.4f) -> no %s", depot_location[0], depot_location[1], depot_node)
         return depot_node
     
     def _validate_routes(self, routes: List[Route], vehicles: List[Vehicle]):
         """Valida se as rotas são viáveis."""
-        for route in routes:
-            vehicle = next((v for v in vehicles if v.id == route.vehicle_id), None)
+        # Em IDs repetidos vale o primeiro veículo da lista
+        vehicle_by_id = {v.id: v for v in reversed(vehicles)}
+        
+        # Peso total de cada rota em uma única redução (bincount por rota)
+        sizes = np.fromiter((len(route.deliveries) for route in routes), dtype=np.int64, count=len(routes))
+        weights = np.fromiter((d.weight for route in routes for d in route.deliveries),
+                              dtype=np.float64, count=int(sizes.sum()))
+        route_weights = np.bincount(np.repeat(np.arange(len(routes)), sizes), weights=weights,
+                                    minlength=len(routes))
+        
+        for route, total_weight in zip(routes, route_weights.tolist()):
+            vehicle = vehicle_by_id.get(route.vehicle_id)
             if not vehicle:
                 route.is_feasible = False
                 continue
             
-            total_weight = sum(d.weight for d in route.deliveries)
             if total_weight > vehicle.capacity:
                 route.is_feasible = False
                 print(f"Aviso: Rota do veículo {vehicle.id} excede capacidade")
@@ -309,9 +527,13 @@ class VRPManager:
         if not routes:
             return {}
         
-        total_distance = sum(route.total_distance for route in routes)
-        total_deliveries = sum(len(route.deliveries) for route in routes)
-        feasible_routes = sum(1 for route in routes if route.is_feasible)
+        n = len(routes)
+        total_distance = float(np.fromiter((route.total_distance for route in routes),
+                                           dtype=np.float64, count=n).sum())
+        total_deliveries = int(np.fromiter((len(route.deliveries) for route in routes),
+                                           dtype=np.int64, count=n).sum())
+        feasible_routes = int(np.count_nonzero(np.fromiter((route.is_feasible for route in routes),
+                                                           dtype=bool, count=n)))
         
         return {
             'total_routes': len(routes),